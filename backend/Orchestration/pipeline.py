@@ -2,6 +2,10 @@
 Main pipeline orchestration module.
 Refined to handle Dark Web Monitors and automated routing to Victim/Indicator DAOs.
 """
+import hashlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 from backend.core.feed_manager import FeedManager
@@ -22,6 +26,9 @@ from backend.processors.risk_engine import RiskEngine
 
 logger = CTILogger.get_logger(__name__)
 
+# process_feed default meaning "not prefetched" (a feed's fetch() may itself return None)
+_NOT_FETCHED = object()
+
 class CTIPipeline:
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or {}
@@ -45,10 +52,14 @@ class CTIPipeline:
         }
         logger.info("Initialized CTI pipeline with Dark Web Monitor support")
 
-    def process_feed(self, feed_instance) -> Dict[str, Any]:
+    def process_feed(self, feed_instance, raw_data: Any = _NOT_FETCHED) -> Dict[str, Any]:
         """
         Orchestrates the lifecycle of a single feed.
         Supports both Clearweb (fetch -> parse) and Darkweb (integrated fetch).
+
+        Args:
+            feed_instance: Feed to process
+            raw_data: Already-fetched payload, even None (skips the fetch step when given)
         """
         feed_name = feed_instance.name
         logger.info(f"🚀 Processing pipeline for: {feed_name}")
@@ -56,7 +67,8 @@ class CTIPipeline:
         try:
             # 1. Ingestion & Pre-Parsing
             # Darkweb Monitor returns structured 'detections' directly.
-            raw_data = feed_instance.fetch()
+            if raw_data is _NOT_FETCHED:
+                raw_data = feed_instance.fetch()
             
             # 2. Intellectual Routing
             if "ransomware" in feed_name.lower():
@@ -65,9 +77,12 @@ class CTIPipeline:
                 return self._handle_standard_ioc_flow(feed_instance, raw_data)
             
         except Exception as e:
-            logger.error(f"💥 Pipeline failure for {feed_name}: {e}", exc_info=True)
-            self.feed_dao.update_stats(feed_name, success=False, error=str(e))
-            return {"success": False, "feed_name": feed_name, "error": str(e)}
+            return self._record_failure(feed_name, e)
+
+    def _record_failure(self, feed_name: str, error: Exception) -> Dict[str, Any]:
+        logger.error(f"💥 Pipeline failure for {feed_name}: {error}", exc_info=error)
+        self.feed_dao.update_stats(feed_name, success=False, error=str(error))
+        return {"success": False, "feed_name": feed_name, "error": str(error)}
 
     def _handle_ransomware_flow(self, feed_instance, data: Dict[str, Any]) -> Dict[str, Any]:
         """Specialized flow for dark web ransomware victims."""
@@ -100,12 +115,9 @@ class CTIPipeline:
         parser = self._select_parser(feed_instance.name)
         parsed_data = parser.parse(raw_data)
         
-        normalized = self.normalizer.normalize_batch(parsed_data)
-        clean_data = self.deduplicator.deduplicate(normalized)
-        
-        # Score and store
-        scored_data = self.risk_engine.score_batch(clean_data)
-        self.indicator_dao.upsert_batch(scored_data)
+        # Normalize, deduplicate, score and store
+        clean_data = self.process(parsed_data)
+        self.indicator_dao.upsert_batch(clean_data)
         
         # NESA Audit
         feed_instance.save_raw_data(raw_data)
@@ -113,19 +125,71 @@ class CTIPipeline:
         
         return {"success": True, "feed": feed_instance.name, "count": len(clean_data), "type": "Indicators"}
 
+    def process(self, iocs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Normalize, deduplicate and risk-score IOCs in a single pass.
+
+        Equivalent to normalize_batch -> deduplicate -> score_batch, but each
+        IOC runs through every stage before the next one is read, so no
+        intermediate lists are materialized between stages.
+        """
+        normalize = self.normalizer.normalize
+        try_add = self.deduplicator.try_add
+        calculate_risk = self.risk_engine.calculate_risk
+        processed = []
+        by_type = Counter()
+        
+        try:
+            for ioc in iocs:
+                normalized = normalize(ioc)
+                if normalized is None or not try_add(normalized["fingerprint"]):
+                    continue
+                
+                risk_assessment = calculate_risk(normalized)
+                normalized["risk_score"] = risk_assessment["risk_score"]
+                normalized["risk_level"] = risk_assessment["risk_level"]
+                normalized["risk_breakdown"] = risk_assessment["breakdown"]
+                processed.append(normalized)
+                by_type[normalized["ioc_type"]] += 1
+        finally:
+            # One append to the fingerprint log per batch
+            self.deduplicator.flush()
+        
+        logger.info(f"Processed {len(iocs)} IOCs: {len(processed)} new {dict(by_type)}")
+        return processed
+
     def _select_parser(self, feed_name: str):
         fn = feed_name.lower()
         if any(x in fn for x in ["cisa", "kev", "otx"]): return self.parsers["vulnerability"]
         return self.parsers["malware"]
 
     def run_all_feeds(self, feed_instances: List) -> Dict[str, Any]:
-        """Executes all enabled feeds in sequence."""
+        """
+        Executes all enabled feeds.
+
+        Fetches are network-bound, so they run concurrently in a thread pool
+        (wall-clock ~ slowest feed instead of the sum of all feeds). Parsing,
+        dedup and storage then run in feed order on the calling thread, since
+        the deduplicator and DAOs are not thread-safe.
+        """
         results = []
+        enabled = []
         for f in feed_instances:
             if self.feed_manager.is_feed_enabled(f.name):
-                results.append(self.process_feed(f))
+                enabled.append(f)
             else:
                 logger.info(f"⏩ Skipping disabled feed: {f.name}")
+
+        if enabled:
+            max_workers = min(len(enabled), self.config.get("max_feed_workers", 8))
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="feed-fetch") as pool:
+                futures = [pool.submit(f.fetch) for f in enabled]
+                for f, future in zip(enabled, futures):
+                    error = future.exception()
+                    if error is not None:
+                        results.append(self._record_failure(f.name, error))
+                    else:
+                        results.append(self.process_feed(f, raw_data=future.result()))
                 
         return {
             "execution_time": datetime.now().isoformat(),
@@ -10,12 +10,20 @@ from urllib.parse import urlparse
 import requests
 import cloudscraper
 from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
 from urllib3.util.retry import Retry
 
 from backend.core.logger import CTILogger
 
 logger = CTILogger.get_logger(__name__)
 
+# Advertise only the encodings urllib3 can decode in this environment
+# (br/zstd need the optional brotli/zstandard packages), strongest first.
+# Bulk JSON feeds such as CISA KEV and Malpedia then arrive compressed.
+_ENCODING_PREFERENCE = ("zstd", "br", "gzip", "deflate")
+_DECODABLE_ENCODINGS = make_headers(accept_encoding=True)["accept-encoding"].split(",")
+ACCEPT_ENCODING = ", ".join(e for e in _ENCODING_PREFERENCE if e in _DECODABLE_ENCODINGS)
+
 class SecureHTTPClient:
     """
     Refined HTTP client that handles Clearweb (Cloudflare) and Darkweb (Tor) routing.
@@ -47,6 +55,10 @@ class SecureHTTPClient:
             browser={'browser': 'chrome', 'platform': 'windows', 'desktop': True}
         )
         
+        # Compressed transfer; bodies are decoded transparently by urllib3
+        self.standard_session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        self.cloudflare_scraper.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        
         # Configure Retries for resilience
         retry_strategy = Retry(
             total=max_retries,
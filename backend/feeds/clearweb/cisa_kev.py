@@ -2,7 +2,8 @@
 CISA KEV (Known Exploited Vulnerabilities) feed implementation.
 """
 
-from typing import Any, Dict, Optional
+from itertools import chain
+from typing import Any, Dict, Iterator, Optional
 from datetime import datetime
 
 from backend.core.logger import CTILogger
@@ -59,17 +60,32 @@ class CISAKEVFeed(BaseFeed):
             raise
 
     def validate(self, data: Dict[str, Any]) -> bool:
-        """Strict validation for CTI data integrity."""
+        """
+        Strict validation for CTI data integrity.
+        'vulnerabilities' may be a list or a lazily-parsed iterator; an iterator
+        is only advanced to its first entry and re-injected unconsumed.
+        """
         if not (data and "data" in data):
             return False
             
         vulns = data["data"].get("vulnerabilities", [])
-        if not isinstance(vulns, list) or len(vulns) == 0:
+        if isinstance(vulns, list):
+            if len(vulns) == 0:
+                logger.error("KEV data is empty or invalid format")
+                return False
+            sample = vulns[0]
+        elif isinstance(vulns, Iterator):
+            sample = next(vulns, None)
+            if sample is None:
+                logger.error("KEV data is empty or invalid format")
+                return False
+            # Put the sampled entry back so downstream consumers see the full stream
+            data["data"]["vulnerabilities"] = chain([sample], vulns)
+        else:
             logger.error("KEV data is empty or invalid format")
             return False
             
         # Verify a sample entry for expected schema
-        sample = vulns[0]
         required = ["cveID", "vendorProject", "product"]
         if not all(k in sample for k in required):
             logger.error(f"KEV schema mismatch. Missing one of: {required}")
@@ -1,16 +1,43 @@
+import asyncio
 import hashlib
+import io
 import json
 import re
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 from bs4 import BeautifulSoup
+
+# xxh3 is an order of magnitude faster than SHA-256 for the no-change fingerprint check
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 from backend.feeds.base_feed import BaseFeed
 from backend.core.logger import CTILogger
 
 logger = CTILogger.get_logger(__name__)
 
 class RansomwareMonitorFeed(BaseFeed):
+    # Dates and "mon dd" stamps stripped during victim normalization
+    _DATE_NOISE_RE = re.compile(
+        r'\b\d{4}-\d{2}-\d{2}\b|\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{1,2}\b'
+    )
+
+    # Leak-site selectors in priority order as (tag or None, required classes):
+    # article.victim, .victim-card, .post.leak, tr.leak-row, .card.victim
+    _VICTIM_SELECTORS = (
+        ("article", frozenset({"victim"})),
+        (None, frozenset({"victim-card"})),
+        (None, frozenset({"post", "leak"})),
+        ("tr", frozenset({"leak-row"})),
+        (None, frozenset({"card", "victim"})),
+    )
+    # Generic fallback: article, .post, .card
+    _FALLBACK_CLASSES = frozenset({"post", "card"})
+    _CANDIDATE_CLASSES = frozenset({"victim", "victim-card", "post", "leak", "leak-row", "card"})
+
     def __init__(self, http_client: Any, config: Optional[Dict[str, Any]] = None):
         """
         Refined Monitor using the BaseFeed blueprint.
@@ -25,10 +52,14 @@ class RansomwareMonitorFeed(BaseFeed):
         self.max_response_size = 10 * 1024 * 1024  # 10 MB
         self.min_victim_length = 20
         self.max_victims_per_page = 500
+        # source_id -> (fast fingerprint, victim_hash) from the previous crawl
+        self._victim_fingerprints: Dict[str, Tuple[int, str]] = {}
 
     def fetch(self, last_run: Optional[str] = None) -> Dict[str, Any]:
         """
         The main execution block called by the Orchestrator.
+        Onion sources are crawled concurrently (bounded by 'max_concurrent')
+        so wall-clock time tracks the slowest source, not the sum of all.
         """
         sources = self.config.get("sources", {})
         full_intelligence_report = {
@@ -37,34 +68,60 @@ class RansomwareMonitorFeed(BaseFeed):
             "detections": {}
         }
 
-        for source_id, url in sources.items():
-            try:
-                logger.info(f"🔍 Crawling Dark Web Source: {source_id}")
-                
-                # Use the inherited http_client (TorHTTPClient)
-                # Note: safe_stream_response logic is now handled by the client/orchestrator
-                response = self.http_client.get(url, stream=True)
-                html = self._safe_read_response(response)
-                
-                victims = self._parse_victims(html)
-                current_hash = self._generate_victim_hash(victims)
-                
-                # Check against state (inherited from BaseFeed)
-                last_hash = self.get_last_run_time() # Or specific source state logic
-                
-                full_intelligence_report["detections"][source_id] = {
-                    "url": url,
-                    "victim_hash": current_hash,
-                    "count": len(victims),
-                    "victims": victims,
-                    "changed": current_hash != last_hash
-                }
-
-            except Exception as e:
-                logger.error(f"❌ Source {source_id} failed: {str(e)}")
+        if sources:
+            detections = asyncio.run(self._crawl_sources(sources))
+            full_intelligence_report["detections"] = detections
 
         return full_intelligence_report
 
+    async def _crawl_sources(self, sources: Dict[str, str]) -> Dict[str, Any]:
+        """Fans out one crawl per source; the semaphore caps open Tor circuits."""
+        semaphore = asyncio.Semaphore(self.config.get("max_concurrent", 4))
+
+        async def crawl(source_id: str, url: str):
+            async with semaphore:
+                try:
+                    # TorHTTPClient is blocking, so each crawl runs in a worker thread
+                    return source_id, await asyncio.to_thread(self._crawl_source, source_id, url)
+                except Exception as e:
+                    logger.error(f"❌ Source {source_id} failed: {str(e)}")
+                    return source_id, None
+
+        results = await asyncio.gather(*(crawl(sid, url) for sid, url in sources.items()))
+        # Preserve the configured source order in the report
+        return {source_id: detection for source_id, detection in results if detection is not None}
+
+    def _crawl_source(self, source_id: str, url: str) -> Dict[str, Any]:
+        """Fetches, parses and fingerprints a single onion source."""
+        logger.info(f"🔍 Crawling Dark Web Source: {source_id}")
+
+        # Use the inherited http_client (TorHTTPClient)
+        # Note: safe_stream_response logic is now handled by the client/orchestrator
+        response = self.http_client.get(url, stream=True)
+        html = self._safe_read_response(response)
+
+        victims = self._parse_victims(html)
+
+        # Only pay for the per-victim SHA-256 attestation hash when the page changed
+        fast_fp = self._fast_fingerprint(victims)
+        cached = self._victim_fingerprints.get(source_id)
+        if cached and cached[0] == fast_fp:
+            current_hash = cached[1]
+        else:
+            current_hash = self._generate_victim_hash(victims)
+            self._victim_fingerprints[source_id] = (fast_fp, current_hash)
+
+        # Check against state (inherited from BaseFeed)
+        last_hash = self.get_last_run_time() # Or specific source state logic
+
+        return {
+            "url": url,
+            "victim_hash": current_hash,
+            "count": len(victims),
+            "victims": victims,
+            "changed": current_hash != last_hash
+        }
+
     def validate(self, data: Dict[str, Any]) -> bool:
         """NESA Requirement: Validate data integrity before processing."""
         return "detections" in data and len(data["detections"]) > 0
@@ -72,36 +129,48 @@ class RansomwareMonitorFeed(BaseFeed):
     def _safe_read_response(self, response) -> str:
         """Prevents Memory Exhaustion (DoS) from malicious .onion sites."""
         total_size = 0
-        content = []
-        for chunk in response.iter_content(chunk_size=8192):
+        # BytesIO grows one contiguous buffer; decoding once at the end also keeps
+        # multi-byte characters that straddle chunk boundaries intact.
+        buffer = io.BytesIO()
+        for chunk in response.iter_content(chunk_size=65536):
             total_size += len(chunk)
             if total_size > self.max_response_size:
                 raise ValueError("Response exceeded safety limit (10MB).")
-            content.append(chunk.decode("utf-8", errors="ignore"))
-        return "".join(content)
+            buffer.write(chunk)
+        return buffer.getvalue().decode("utf-8", errors="ignore")
 
     def _normalize_victim(self, text: str) -> str:
         """Data Minimization: Strips noise and PII before hashing."""
-        text = text.lower().strip()
         # Remove dates and noise
-        text = re.sub(r'\b\d{4}-\d{2}-\d{2}\b|\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{1,2}\b', '', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text[:200]
+        text = self._DATE_NOISE_RE.sub('', text.lower())
+        # split()/join collapses and strips whitespace in a single C-level pass
+        return " ".join(text.split())[:200]
 
     def _parse_victims(self, html: str) -> List[Dict]:
         """Extracts victim data using specialized ransomware leak site selectors."""
         soup = BeautifulSoup(html, "html.parser")
         victims = []
-        selectors = ["article.victim", ".victim-card", ".post.leak", "tr.leak-row", ".card.victim"]
-        
-        items = []
-        for s in selectors:
-            items = soup.select(s)
-            if items: break
-        
-        if not items:
-            items = soup.select("article, .post, .card")
 
+        # Single traversal: bucket every candidate node against all selectors at once
+        # instead of re-scanning the whole tree with one select() per selector.
+        buckets = [[] for _ in self._VICTIM_SELECTORS]
+        fallback = []
+        for node in soup.find_all(True):
+            classes = node.get("class") or ()
+            if node.name != "article" and self._CANDIDATE_CLASSES.isdisjoint(classes):
+                continue
+            classes = set(classes)
+            for bucket, (tag, required) in zip(buckets, self._VICTIM_SELECTORS):
+                if (tag is None or node.name == tag) and required <= classes:
+                    bucket.append(node)
+            if node.name == "article" or not self._FALLBACK_CLASSES.isdisjoint(classes):
+                fallback.append(node)
+
+        # First selector (in priority order) with any hits wins, as before
+        items = next((bucket for bucket in buckets if bucket), fallback)
+
+        # One timestamp per crawl rather than a datetime allocation per victim
+        discovered_at = datetime.utcnow().isoformat()
         for item in items[:self.max_victims_per_page]:
             text = item.get_text(" ", strip=True)
             normalized = self._normalize_victim(text)
@@ -109,11 +178,18 @@ class RansomwareMonitorFeed(BaseFeed):
             if len(normalized) >= self.min_victim_length:
                 victims.append({
                     "title": normalized,
-                    "discovered_at": datetime.utcnow().isoformat()
+                    "discovered_at": discovered_at
                 })
         return victims
 
     def _generate_victim_hash(self, victims: List[Dict]) -> str:
         """Intelligence-first hashing: Ignores CSS/UI changes."""
         signatures = sorted([hashlib.sha256(v["title"].encode()).hexdigest()[:16] for v in victims])
-        return hashlib.sha256(json.dumps(signatures).encode()).hexdigest()
\ No newline at end of file
+        return hashlib.sha256(json.dumps(signatures).encode()).hexdigest()
+
+    def _fast_fingerprint(self, victims: List[Dict]) -> int:
+        """Cheap 64-bit fingerprint of the victim titles (single pass, no per-victim hashing)."""
+        payload = "\n".join(sorted(v["title"] for v in victims)).encode()
+        if xxhash is not None:
+            return xxhash.xxh3_64_intdigest(payload)
+        return int.from_bytes(hashlib.blake2b(payload, digest_size=8).digest(), "little")
\ No newline at end of file
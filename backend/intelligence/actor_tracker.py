@@ -8,7 +8,13 @@ multiple feeds and time periods.
 import json
 from collections import defaultdict
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+# msgpack gives a compact binary store that loads much faster than JSON for large corpora
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 from backend.core.logger import CTILogger
 
@@ -41,43 +47,71 @@ class ActorTracker:
     
     def _load_actors(self) -> None:
         """Load actor data from disk and normalize in-memory types."""
-        actors_file = self.data_dir / "actors.json"
-        if actors_file.exists():
-            try:
-                with open(actors_file, "r", encoding="utf-8") as f:
+        actors_file = self.data_dir / "actors.msgpack"
+        json_file = self.data_dir / "actors.json"
+        try:
+            if msgpack is not None and actors_file.exists():
+                loaded = msgpack.unpackb(actors_file.read_bytes(), raw=False)
+            elif json_file.exists():
+                # Legacy/fallback store; migrated to msgpack on the next save
+                with open(json_file, "r", encoding="utf-8") as f:
                     loaded = json.load(f)
-                # Normalize sources to sets in memory
-                self._actors = {}
-                for name, actor in loaded.items():
-                    sources = actor.get("sources") or []
-                    if isinstance(sources, list):
-                        actor["sources"] = set(sources)
-                    elif isinstance(sources, set):
-                        actor["sources"] = sources
-                    else:
-                        actor["sources"] = set()
-                    self._actors[name] = actor
-            except Exception as e:
-                logger.warning(f"Failed to load actors: {e}")
-                self._actors = {}
+            else:
+                return
+            # Normalize sources to sets in memory
+            self._actors = {}
+            for name, actor in loaded.items():
+                sources = actor.get("sources") or []
+                if isinstance(sources, list):
+                    actor["sources"] = set(sources)
+                elif isinstance(sources, set):
+                    actor["sources"] = sources
+                else:
+                    actor["sources"] = set()
+                self._actors[name] = actor
+        except Exception as e:
+            logger.warning(f"Failed to load actors: {e}")
+            self._actors = {}
+    
+    def _serializable_actors(self) -> Dict[str, Dict[str, Any]]:
+        """Snapshot of actor data with sets converted to lists."""
+        serializable: Dict[str, Dict[str, Any]] = {}
+        for name, actor in self._actors.items():
+            data = dict(actor)
+            sources = data.get("sources")
+            if isinstance(sources, set):
+                data["sources"] = list(sources)
+            serializable[name] = data
+        return serializable
     
     def _save_actors(self) -> None:
-        """Save actor data to disk (converting sets to lists)."""
-        actors_file = self.data_dir / "actors.json"
+        """Save actor data to disk (msgpack when available, JSON otherwise)."""
         try:
-            serializable: Dict[str, Dict[str, Any]] = {}
-            for name, actor in self._actors.items():
-                data = dict(actor)
-                sources = data.get("sources")
-                if isinstance(sources, set):
-                    data["sources"] = list(sources)
-                serializable[name] = data
-
-            with open(actors_file, "w", encoding="utf-8") as f:
-                json.dump(serializable, f, indent=2, default=str)
+            if msgpack is None:
+                self.export_json()
+                return
+            actors_file = self.data_dir / "actors.msgpack"
+            actors_file.write_bytes(
+                msgpack.packb(self._serializable_actors(), use_bin_type=True, default=str)
+            )
         except Exception as e:
             logger.error(f"Failed to save actors: {e}")
     
+    def export_json(self, filepath: Optional[Path] = None) -> Path:
+        """
+        Export actor data as human-readable JSON.
+        
+        Args:
+            filepath: Output file path (defaults to actors.json in data_dir)
+            
+        Returns:
+            Path of the written file
+        """
+        filepath = Path(filepath) if filepath else self.data_dir / "actors.json"
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(self._serializable_actors(), f, indent=2, default=str)
+        return filepath
+    
     def track_actor(self, actor_name: str, ioc: Dict[str, Any]) -> None:
         """
         Associate an IOC with a threat actor.
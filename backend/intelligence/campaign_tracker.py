@@ -5,15 +5,34 @@ Tracks threat campaigns, their IOCs, and temporal patterns
 across multiple feeds and sources.
 """
 
+import hashlib
 import json
+import os
+import re
 from collections import defaultdict
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Set
+
+# Use orjson for faster (de)serialization of the tracker store if installed
+try:
+    import orjson as json_lib
+except ImportError:
+    json_lib = json
+
+# Optional: ijson streams large legacy JSON stores instead of reading them whole
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 from backend.core.logger import CTILogger
+from backend.utils.jsonl import dumps_line
 
 logger = CTILogger.get_logger(__name__)
 
+# Legacy JSON stores above this size are streamed with ijson (when installed)
+STREAM_LOAD_THRESHOLD = 50 * 1024 * 1024  # 50 MB
+
 
 class CampaignTracker:
     """
@@ -21,8 +40,16 @@ class CampaignTracker:
     
     Identifies campaigns based on temporal patterns, actor associations,
     and IOC clustering.
+    
+    Campaigns are persisted to an append-only JSONL log (one upsert per
+    changed campaign per flush) that is compacted once it holds more than
+    COMPACT_RATIO entries per live campaign. Each campaign's IOCs live in
+    their own append-only JSONL file under ``campaigns/`` and are only
+    read on demand, so memory stays O(#campaigns) rather than O(#IOCs).
     """
     
+    COMPACT_RATIO = 4
+    
     def __init__(self, data_dir: Path = None):
         """
         Initialize campaign tracker.
@@ -34,59 +61,142 @@ class CampaignTracker:
             data_dir = Path(__file__).parent.parent.parent / "data" / "processed"
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.log_file = self.data_dir / "campaigns.jsonl"
+        self.iocs_dir = self.data_dir / "campaigns"
+        self.iocs_dir.mkdir(parents=True, exist_ok=True)
         
         self._campaigns: Dict[str, Dict[str, Any]] = {}
+        # Campaign IDs changed since the last flush, and records in the log
+        self._dirty: Set[str] = set()
+        self._log_entries = 0
+        # IOCs not yet appended to their campaign file; files to rewrite rather than append to
+        self._pending_iocs: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._rewrite_iocs: Set[str] = set()
+        # Inverted indexes: actor/source -> campaign IDs
+        self._by_actor: Dict[str, Set[str]] = defaultdict(set)
+        self._by_source: Dict[str, Set[str]] = defaultdict(set)
         self._load_campaigns()
+        self._rebuild_indexes()
         
         logger.info(f"Initialized campaign tracker with {len(self._campaigns)} campaigns")
     
     def _load_campaigns(self) -> None:
-        """Load campaign data from disk and normalize in-memory types."""
-        campaigns_file = self.data_dir / "campaigns.json"
-        if campaigns_file.exists():
-            try:
-                with open(campaigns_file, "r", encoding="utf-8") as f:
-                    loaded = json.load(f)
-                self._campaigns = {}
-                for cid, campaign in loaded.items():
-                    sources = campaign.get("sources") or []
-                    actors = campaign.get("actors") or []
-                    if isinstance(sources, list):
-                        campaign["sources"] = set(sources)
-                    elif isinstance(sources, set):
-                        campaign["sources"] = sources
-                    else:
-                        campaign["sources"] = set()
-                    if isinstance(actors, list):
-                        campaign["actors"] = set(actors)
-                    elif isinstance(actors, set):
-                        campaign["actors"] = actors
+        """Replay the campaign log (or legacy campaigns.json) and normalize in-memory types."""
+        legacy_file = self.data_dir / "campaigns.json"
+        corrupt_lines = 0
+        try:
+            if self.log_file.exists():
+                with open(self.log_file, "rb") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            record = json_lib.loads(line)
+                        except ValueError:
+                            # Torn final line from an interrupted append
+                            corrupt_lines += 1
+                            continue
+                        self._campaigns[record["id"]] = record["data"]
+                        self._log_entries += 1
+            elif legacy_file.exists():
+                with open(legacy_file, "rb") as f:
+                    if ijson is not None and legacy_file.stat().st_size > STREAM_LOAD_THRESHOLD:
+                        # One record at a time; avoids holding the raw file and the parsed tree together
+                        self._campaigns = dict(ijson.kvitems(f, "", use_float=True))
                     else:
-                        campaign["actors"] = set()
-                    self._campaigns[cid] = campaign
-            except Exception as e:
-                logger.warning(f"Failed to load campaigns: {e}")
-                self._campaigns = {}
+                        self._campaigns = json_lib.loads(f.read())
+                # Migrate on the next flush
+                self._dirty.update(self._campaigns)
+            
+            for cid, campaign in self._campaigns.items():
+                for field in ("sources", "actors"):
+                    values = campaign.get(field) or []
+                    campaign[field] = set(values) if isinstance(values, (list, set)) else set()
+                if "iocs" in campaign:
+                    # Older records embed their IOCs; move them to the per-campaign file
+                    iocs = campaign.pop("iocs") or []
+                    campaign["ioc_count"] = len(iocs)
+                    self._pending_iocs[cid] = iocs
+                    self._rewrite_iocs.add(cid)
+                    self._dirty.add(cid)
+                campaign.setdefault("ioc_count", 0)
+        except Exception as e:
+            logger.warning(f"Failed to load campaigns: {e}")
+            self._campaigns = {}
+            self._dirty.clear()
+            self._pending_iocs.clear()
+            self._rewrite_iocs.clear()
+            return
+        
+        if corrupt_lines:
+            # Rewrite so later appends don't land on the end of a torn line
+            logger.warning(f"Skipped {corrupt_lines} corrupt line(s) in campaign log; compacting")
+            self.compact()
+    
+    def _rebuild_indexes(self) -> None:
+        """Rebuild the actor/source indexes from the loaded campaigns."""
+        self._by_actor.clear()
+        self._by_source.clear()
+        for cid, campaign in self._campaigns.items():
+            for actor in campaign["actors"]:
+                self._by_actor[actor].add(cid)
+            for source in campaign["sources"]:
+                self._by_source[source].add(cid)
+    
+    @staticmethod
+    def _serializable(campaign: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of a campaign with sets converted to lists."""
+        data = dict(campaign)
+        for field in ("sources", "actors"):
+            if isinstance(data.get(field), set):
+                data[field] = list(data[field])
+        return data
+    
+    def _iocs_file(self, campaign_id: str) -> Path:
+        """Per-campaign IOC file; IDs that aren't filename-safe get a hash suffix."""
+        safe_id = re.sub(r"[^A-Za-z0-9._-]", "_", campaign_id)
+        if safe_id != campaign_id:
+            safe_id = f"{safe_id}-{hashlib.sha1(campaign_id.encode('utf-8')).hexdigest()[:8]}"
+        return self.iocs_dir / f"{safe_id}.jsonl"
     
     def _save_campaigns(self) -> None:
-        """Save campaign data to disk (converting sets to lists)."""
-        campaigns_file = self.data_dir / "campaigns.json"
+        """Append changed campaigns to the log, compacting it when it grows too large."""
+        if not self._dirty:
+            return
         try:
-            serializable: Dict[str, Dict[str, Any]] = {}
-            for cid, campaign in self._campaigns.items():
-                data = dict(campaign)
-                sources = data.get("sources")
-                actors = data.get("actors")
-                if isinstance(sources, set):
-                    data["sources"] = list(sources)
-                if isinstance(actors, set):
-                    data["actors"] = list(actors)
-                serializable[cid] = data
-
-            with open(campaigns_file, "w", encoding="utf-8") as f:
-                json.dump(serializable, f, indent=2, default=str)
+            # IOC files first, so a logged ioc_count never runs ahead of the IOCs on disk
+            for cid, iocs in self._pending_iocs.items():
+                mode = "wb" if cid in self._rewrite_iocs else "ab"
+                with open(self._iocs_file(cid), mode) as f:
+                    f.writelines(dumps_line(ioc) for ioc in iocs)
+            self._pending_iocs.clear()
+            self._rewrite_iocs.clear()
+            
+            with open(self.log_file, "ab") as f:
+                for cid in self._dirty:
+                    record = {"op": "upsert", "id": cid, "data": self._serializable(self._campaigns[cid])}
+                    f.write(dumps_line(record))
+            self._log_entries += len(self._dirty)
+            self._dirty.clear()
         except Exception as e:
             logger.error(f"Failed to save campaigns: {e}")
+            return
+        
+        if self._log_entries > self.COMPACT_RATIO * max(len(self._campaigns), 1):
+            self.compact()
+    
+    def compact(self) -> None:
+        """Rewrite the campaign log with a single upsert per campaign."""
+        tmp_file = self.log_file.with_name(self.log_file.name + ".tmp")
+        try:
+            with open(tmp_file, "wb") as f:
+                for cid, campaign in self._campaigns.items():
+                    f.write(dumps_line({"op": "upsert", "id": cid, "data": self._serializable(campaign)}))
+            os.replace(tmp_file, self.log_file)
+            self._log_entries = len(self._campaigns)
+            logger.debug(f"Compacted campaign log to {self._log_entries} entries")
+        except Exception as e:
+            logger.error(f"Failed to compact campaign log: {e}")
     
     def identify_campaign(self, ioc: Dict[str, Any]) -> str:
         """
@@ -120,39 +230,56 @@ class CampaignTracker:
     
     def track_campaign(self, campaign_id: str, ioc: Dict[str, Any]) -> None:
         """
-        Associate an IOC with a campaign.
+        Associate an IOC with a campaign and persist immediately.
         
         Args:
             campaign_id: Campaign identifier
             ioc: IOC dictionary
         """
-        if campaign_id not in self._campaigns:
-            self._campaigns[campaign_id] = {
+        self._track_campaign_nosave(campaign_id, ioc)
+        self._save_campaigns()
+    
+    def _track_campaign_nosave(self, campaign_id: str, ioc: Dict[str, Any]) -> None:
+        """Associate an IOC with a campaign in memory only (caller saves)."""
+        self._track_campaign_group(campaign_id, [ioc])
+    
+    def _track_campaign_group(self, campaign_id: str, iocs: List[Dict[str, Any]]) -> None:
+        """Associate a group of IOCs with one campaign in a single update (caller saves)."""
+        campaign = self._campaigns.get(campaign_id)
+        if campaign is None:
+            campaign = self._campaigns[campaign_id] = {
                 "campaign_id": campaign_id,
-                "iocs": [],
-                "first_seen": ioc.get("first_seen"),
-                "last_seen": ioc.get("last_seen"),
+                "first_seen": iocs[0].get("first_seen"),
+                "last_seen": iocs[0].get("last_seen"),
                 "ioc_count": 0,
                 "sources": set(),
                 "actors": set()
             }
         
-        campaign = self._campaigns[campaign_id]
-        campaign["iocs"].append(ioc)
-        campaign["ioc_count"] = len(campaign["iocs"])
-        campaign["last_seen"] = ioc.get("last_seen")
-        campaign["sources"].add(ioc.get("source", "unknown"))
+        self._dirty.add(campaign_id)
+        self._pending_iocs[campaign_id].extend(iocs)
+        campaign["ioc_count"] += len(iocs)
+        campaign["last_seen"] = iocs[-1].get("last_seen")
         
-        # Extract actor from metadata
-        metadata = ioc.get("metadata", {})
-        actor = metadata.get("group") or metadata.get("threat_actor")
-        if actor:
-            campaign["actors"].add(actor)
-        
-        # Convert sets to lists for JSON serialization
-        campaign["sources"] = list(campaign["sources"])
-        campaign["actors"] = list(campaign["actors"])
+        sources = {ioc.get("source", "unknown") for ioc in iocs}
+        # Extract actors from metadata
+        actors = set()
+        for ioc in iocs:
+            metadata = ioc.get("metadata", {})
+            actor = metadata.get("group") or metadata.get("threat_actor")
+            if actor:
+                actors.add(actor)
         
+        # sources/actors stay sets in memory; _save_campaigns converts them on write
+        campaign["sources"] |= sources
+        campaign["actors"] |= actors
+        for source in sources:
+            self._by_source[source].add(campaign_id)
+        for actor in actors:
+            self._by_actor[actor].add(campaign_id)
+    
+    def flush(self) -> None:
+        """Persist pending in-memory campaign updates to disk."""
         self._save_campaigns()
     
     def get_campaign(self, campaign_id: str) -> Dict[str, Any]:
@@ -163,29 +290,88 @@ class CampaignTracker:
             campaign_id: Campaign identifier
             
         Returns:
-            Campaign dictionary or empty dict if not found
+            Campaign dictionary (including its IOCs) or empty dict if not found
         """
-        return self._campaigns.get(campaign_id, {})
+        campaign = self._campaigns.get(campaign_id)
+        if campaign is None:
+            return {}
+        return dict(campaign, iocs=self.get_campaign_iocs(campaign_id))
+    
+    def get_campaign_iocs(self, campaign_id: str) -> List[Dict[str, Any]]:
+        """
+        Load the IOCs associated with a campaign.
+        
+        Args:
+            campaign_id: Campaign identifier
+            
+        Returns:
+            List of IOC dictionaries (persisted plus not-yet-flushed)
+        """
+        iocs: List[Dict[str, Any]] = []
+        iocs_file = self._iocs_file(campaign_id)
+        if campaign_id not in self._rewrite_iocs and iocs_file.exists():
+            with open(iocs_file, "rb") as f:
+                iocs.extend(json_lib.loads(line) for line in f if line.strip())
+        iocs.extend(self._pending_iocs.get(campaign_id, ()))
+        return iocs
     
     def get_all_campaigns(self) -> List[Dict[str, Any]]:
         """
         Get all tracked campaigns.
         
         Returns:
-            List of campaign dictionaries
+            List of campaign dictionaries (without IOCs; see get_campaign_iocs)
         """
         return list(self._campaigns.values())
     
-    def process_iocs(self, iocs: List[Dict[str, Any]]) -> None:
+    def get_campaigns_by_actor(self, actor: str) -> List[Dict[str, Any]]:
+        """
+        Get campaigns attributed to a threat actor.
+        
+        Args:
+            actor: Threat actor / group name
+            
+        Returns:
+            List of campaign dictionaries
+        """
+        return [self._campaigns[cid] for cid in self._by_actor.get(actor, ())]
+    
+    def get_campaigns_by_source(self, source: str) -> List[Dict[str, Any]]:
+        """
+        Get campaigns with IOCs reported by a source.
+        
+        Args:
+            source: Feed/source name
+            
+        Returns:
+            List of campaign dictionaries
+        """
+        return [self._campaigns[cid] for cid in self._by_source.get(source, ())]
+    
+    def process_iocs(self, iocs: List[Dict[str, Any]], batch_size: Optional[int] = None) -> None:
         """
         Process IOCs and assign to campaigns.
         
+        IOCs are grouped by campaign first so each campaign is updated once
+        per call. Campaigns are written to disk once at the end (or after
+        roughly every ``batch_size`` IOCs for very large runs).
+        
         Args:
             iocs: List of IOC dictionaries
+            batch_size: Optional number of IOCs between intermediate saves
         """
+        groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
         for ioc in iocs:
-            campaign_id = self.identify_campaign(ioc)
-            self.track_campaign(campaign_id, ioc)
+            groups[self.identify_campaign(ioc)].append(ioc)
+        
+        pending = 0
+        for campaign_id, group in groups.items():
+            self._track_campaign_group(campaign_id, group)
+            pending += len(group)
+            if batch_size and pending >= batch_size:
+                self._save_campaigns()
+                pending = 0
         
-        logger.info(f"Processed {len(iocs)} IOCs into campaigns")
+        self._save_campaigns()
+        logger.info(f"Processed {len(iocs)} IOCs into {len(groups)} campaigns")
 
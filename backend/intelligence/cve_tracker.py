@@ -1,164 +1,280 @@
-    """
-    CVE tracking module.
+"""
+CVE tracking module.
 
-    Tracks CVE information, exploitability, and associated IOCs
-    from vulnerability feeds.
-    """
+Tracks CVE information, exploitability, and associated IOCs
+from vulnerability feeds.
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+# Use orjson for faster (de)serialization of the tracker store if installed
+try:
+    import orjson as json_lib
+except ImportError:
+    json_lib = json
+
+# Optional: ijson streams large legacy JSON stores instead of reading them whole
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from backend.core.logger import CTILogger
+from backend.utils.jsonl import dumps_line
 
-    import json
-    from pathlib import Path
-    from typing import Any, Dict, List
+logger = CTILogger.get_logger(__name__)
 
-    from backend.core.logger import CTILogger
+# Well-formed CVE identifier (CVE-YYYY-NNNN with 4+ digit sequence)
+_CVE_RE = re.compile(r"^CVE-\d{4}-\d{4,}$", re.IGNORECASE)
 
-    logger = CTILogger.get_logger(__name__)
+# Legacy JSON stores above this size are streamed with ijson (when installed)
+STREAM_LOAD_THRESHOLD = 50 * 1024 * 1024  # 50 MB
 
 
-    class CVETracker:
+class CVETracker:
+    """
+    Tracks CVEs and their exploitability status.
+    
+    Maintains CVE database with KEV status, exploitability,
+    and associated threat intelligence.
+    
+    CVEs are persisted to an append-only JSONL log (one upsert per changed
+    CVE per flush) that is compacted once it holds more than COMPACT_RATIO
+    entries per tracked CVE.
+    """
+    
+    COMPACT_RATIO = 4
+    
+    def __init__(self, data_dir: Path = None):
         """
-        Tracks CVEs and their exploitability status.
+        Initialize CVE tracker.
         
-        Maintains CVE database with KEV status, exploitability,
-        and associated threat intelligence.
+        Args:
+            data_dir: Directory for storing CVE data
         """
+        if data_dir is None:
+            data_dir = Path(__file__).parent.parent.parent / "data" / "processed"
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.log_file = self.data_dir / "cves.jsonl"
         
-        def __init__(self, data_dir: Path = None):
-            """
-            Initialize CVE tracker.
-            
-            Args:
-                data_dir: Directory for storing CVE data
-            """
-            if data_dir is None:
-                data_dir = Path(__file__).parent.parent.parent / "data" / "processed"
-            self.data_dir = Path(data_dir)
-            self.data_dir.mkdir(parents=True, exist_ok=True)
-            
-            self._cves: Dict[str, Dict[str, Any]] = {}
-            self._load_cves()
+        self._cves: Dict[str, Dict[str, Any]] = {}
+        # CVE IDs changed since the last flush, and records in the log
+        self._dirty: Set[str] = set()
+        self._log_entries = 0
+        self._load_cves()
+        # Index of KEV-listed CVE IDs so get_kev_cves doesn't scan every CVE
+        self._kev_ids: Set[str] = {cve_id for cve_id, cve in self._cves.items() if cve.get("is_kev")}
+        
+        logger.info(f"Initialized CVE tracker with {len(self._cves)} CVEs")
+    
+    def _load_cves(self) -> None:
+        """Replay the CVE log (or legacy cves.json) and normalize in-memory types."""
+        legacy_file = self.data_dir / "cves.json"
+        corrupt_lines = 0
+        try:
+            if self.log_file.exists():
+                with open(self.log_file, "rb") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            record = json_lib.loads(line)
+                        except ValueError:
+                            # Torn final line from an interrupted append
+                            corrupt_lines += 1
+                            continue
+                        self._cves[record["id"]] = record["data"]
+                        self._log_entries += 1
+            elif legacy_file.exists():
+                with open(legacy_file, "rb") as f:
+                    if ijson is not None and legacy_file.stat().st_size > STREAM_LOAD_THRESHOLD:
+                        # One record at a time; avoids holding the raw file and the parsed tree together
+                        self._cves = dict(ijson.kvitems(f, "", use_float=True))
+                    else:
+                        self._cves = json_lib.loads(f.read())
+                # Migrate on the next flush
+                self._dirty.update(self._cves)
             
-            logger.info(f"Initialized CVE tracker with {len(self._cves)} CVEs")
-        
-        def _load_cves(self) -> None:
-            """Load CVE data from disk and normalize in-memory types."""
-            cves_file = self.data_dir / "cves.json"
-            if cves_file.exists():
-                try:
-                    with open(cves_file, "r", encoding="utf-8") as f:
-                        loaded = json.load(f)
-                    self._cves = {}
-                    for cve_id, cve in loaded.items():
-                        sources = cve.get("sources") or []
-                        if isinstance(sources, list):
-                            cve["sources"] = set(sources)
-                        elif isinstance(sources, set):
-                            cve["sources"] = sources
-                        else:
-                            cve["sources"] = set()
-                        self._cves[cve_id] = cve
-                except Exception as e:
-                    logger.warning(f"Failed to load CVEs: {e}")
-                    self._cves = {}
-        
-        def _save_cves(self) -> None:
-            """Save CVE data to disk (converting sets to lists)."""
-            cves_file = self.data_dir / "cves.json"
-            try:
-                serializable: Dict[str, Dict[str, Any]] = {}
+            for cve in self._cves.values():
+                sources = cve.get("sources") or []
+                cve["sources"] = set(sources) if isinstance(sources, (list, set)) else set()
+        except Exception as e:
+            logger.warning(f"Failed to load CVEs: {e}")
+            self._cves = {}
+            self._dirty.clear()
+            return
+        
+        if corrupt_lines:
+            # Rewrite so later appends don't land on the end of a torn line
+            logger.warning(f"Skipped {corrupt_lines} corrupt line(s) in CVE log; compacting")
+            self.compact()
+    
+    @staticmethod
+    def _serializable(cve: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of a CVE record with sets converted to lists."""
+        data = dict(cve)
+        if isinstance(data.get("sources"), set):
+            data["sources"] = list(data["sources"])
+        return data
+    
+    def _save_cves(self) -> None:
+        """Append changed CVEs to the log, compacting it when it grows too large."""
+        if not self._dirty:
+            return
+        try:
+            with open(self.log_file, "ab") as f:
+                for cve_id in self._dirty:
+                    record = {"op": "upsert", "id": cve_id, "data": self._serializable(self._cves[cve_id])}
+                    f.write(dumps_line(record))
+            self._log_entries += len(self._dirty)
+            self._dirty.clear()
+        except Exception as e:
+            logger.error(f"Failed to save CVEs: {e}")
+            return
+        
+        if self._log_entries > self.COMPACT_RATIO * max(len(self._cves), 1):
+            self.compact()
+    
+    def compact(self) -> None:
+        """Rewrite the CVE log with a single upsert per CVE."""
+        tmp_file = self.log_file.with_name(self.log_file.name + ".tmp")
+        try:
+            with open(tmp_file, "wb") as f:
                 for cve_id, cve in self._cves.items():
-                    data = dict(cve)
-                    sources = data.get("sources")
-                    if isinstance(sources, set):
-                        data["sources"] = list(sources)
-                    serializable[cve_id] = data
-
-                with open(cves_file, "w", encoding="utf-8") as f:
-                    json.dump(serializable, f, indent=2, default=str)
-            except Exception as e:
-                logger.error(f"Failed to save CVEs: {e}")
-        
-        def track_cve(self, cve_id: str, metadata: Dict[str, Any]) -> None:
-            """
-            Track a CVE with metadata.
-            
-            Args:
-                cve_id: CVE identifier (e.g., CVE-2024-1234)
-                metadata: CVE metadata dictionary
-            """
-            if cve_id not in self._cves:
-                self._cves[cve_id] = {
-                    "cve_id": cve_id,
-                    "first_seen": metadata.get("first_seen"),
-                    "last_seen": metadata.get("last_seen"),
-                    "sources": set(),
-                    "is_kev": False,
-                    "exploitability": "unknown"
-                }
-            
-            cve = self._cves[cve_id]
-            cve["last_seen"] = metadata.get("last_seen")
-            cve["sources"].add(metadata.get("source", "unknown"))
-            # Update KEV status
-            if metadata.get("source") == "cisa_kev":
+                    f.write(dumps_line({"op": "upsert", "id": cve_id, "data": self._serializable(cve)}))
+            os.replace(tmp_file, self.log_file)
+            self._log_entries = len(self._cves)
+            logger.debug(f"Compacted CVE log to {self._log_entries} entries")
+        except Exception as e:
+            logger.error(f"Failed to compact CVE log: {e}")
+    
+    def track_cve(self, cve_id: str, metadata: Dict[str, Any]) -> None:
+        """
+        Track a CVE with metadata and persist immediately.
+        
+        Args:
+            cve_id: CVE identifier (e.g., CVE-2024-1234)
+            metadata: CVE metadata dictionary
+        """
+        if self._track_cve_nosave(cve_id, metadata):
+            self._save_cves()
+    
+    def _track_cve_nosave(self, cve_id: str, metadata: Dict[str, Any]) -> bool:
+        """
+        Track a CVE in memory only (caller saves).
+        
+        Returns:
+            True if the stored record changed (and was marked for the next flush)
+        """
+        cve = self._cves.get(cve_id)
+        if cve is None:
+            cve = self._cves[cve_id] = {
+                "cve_id": cve_id,
+                "first_seen": metadata.get("first_seen"),
+                "last_seen": metadata.get("last_seen"),
+                "sources": set(),
+                "is_kev": False,
+                "exploitability": "unknown"
+            }
+            changed = True
+        else:
+            changed = False
+        
+        last_seen = metadata.get("last_seen")
+        source = metadata.get("source", "unknown")
+        if cve["last_seen"] != last_seen:
+            cve["last_seen"] = last_seen
+            changed = True
+        if source not in cve["sources"]:
+            cve["sources"].add(source)
+            changed = True
+        # Update KEV status
+        if metadata.get("source") == "cisa_kev":
+            kev_metadata = {
+                "vendor_project": metadata.get("vendor_project"),
+                "product": metadata.get("product"),
+                "vulnerability_name": metadata.get("vulnerability_name"),
+                "required_action": metadata.get("required_action"),
+                "due_date": metadata.get("due_date"),
+                "known_ransomware_campaign_use": metadata.get("known_ransomware_campaign_use")
+            }
+            if not cve["is_kev"] or cve.get("kev_metadata") != kev_metadata:
                 cve["is_kev"] = True
-                cve["kev_metadata"] = {
-                    "vendor_project": metadata.get("vendor_project"),
-                    "product": metadata.get("product"),
-                    "vulnerability_name": metadata.get("vulnerability_name"),
-                    "required_action": metadata.get("required_action"),
-                    "due_date": metadata.get("due_date"),
-                    "known_ransomware_campaign_use": metadata.get("known_ransomware_campaign_use")
-                }
+                self._kev_ids.add(cve_id)
+                cve["kev_metadata"] = kev_metadata
                 cve["exploitability"] = "known_exploited"
-            
-            self._save_cves()
+                changed = True
         
-        def get_cve(self, cve_id: str) -> Dict[str, Any]:
-            """
-            Get CVE information.
-            
-            Args:
-                cve_id: CVE identifier
-                
-            Returns:
-                CVE dictionary or empty dict if not found
-            """
-            return self._cves.get(cve_id, {})
-        
-        def get_kev_cves(self) -> List[Dict[str, Any]]:
-            """
-            Get all CVE KEV entries.
-            
-            Returns:
-                List of KEV CVE dictionaries
-            """
-            return [cve for cve in self._cves.values() if cve.get("is_kev", False)]
-        
-        def get_all_cves(self) -> List[Dict[str, Any]]:
-            """
-            Get all tracked CVEs.
-            
-            Returns:
-                List of CVE dictionaries
-            """
-            return list(self._cves.values())
-        
-        def process_iocs(self, iocs: List[Dict[str, Any]]) -> None:
-            """
-            Process IOCs and extract CVE information.
-            
-            Args:
-                iocs: List of IOC dictionaries
-            """
-            for ioc in iocs:
-                if ioc.get("ioc_type") == "cve":
-                    cve_id = ioc.get("ioc_value", "")
-                    if cve_id:
-                        metadata = ioc.get("metadata", {})
-                        metadata["source"] = ioc.get("source")
-                        metadata["first_seen"] = ioc.get("first_seen")
-                        metadata["last_seen"] = ioc.get("last_seen")
-                        self.track_cve(cve_id, metadata)
+        # Re-polls of an unchanged CVE don't touch disk on the next flush
+        if changed:
+            self._dirty.add(cve_id)
+        return changed
+    
+    def flush(self) -> None:
+        """Persist pending in-memory CVE updates to disk."""
+        self._save_cves()
+    
+    def get_cve(self, cve_id: str) -> Dict[str, Any]:
+        """
+        Get CVE information.
+        
+        Args:
+            cve_id: CVE identifier
             
-            logger.info(f"Processed CVEs from {len(iocs)} IOCs")
+        Returns:
+            CVE dictionary or empty dict if not found
+        """
+        return self._cves.get(cve_id, {})
+    
+    def get_kev_cves(self) -> List[Dict[str, Any]]:
+        """
+        Get all CVE KEV entries.
+        
+        Returns:
+            List of KEV CVE dictionaries
+        """
+        return [self._cves[cve_id] for cve_id in self._kev_ids]
+    
+    def get_all_cves(self) -> List[Dict[str, Any]]:
+        """
+        Get all tracked CVEs.
+        
+        Returns:
+            List of CVE dictionaries
+        """
+        return list(self._cves.values())
+    
+    def process_iocs(self, iocs: List[Dict[str, Any]], batch_size: Optional[int] = None) -> None:
+        """
+        Process IOCs and extract CVE information.
+        
+        CVEs are updated in memory and written to disk once at the end
+        (or every ``batch_size`` CVEs for very large runs).
+        
+        Args:
+            iocs: List of IOC dictionaries
+            batch_size: Optional number of CVE updates between intermediate saves
+        """
+        # Single filtering pass: CVE-typed IOCs with a well-formed identifier
+        cve_iocs = [
+            ioc for ioc in iocs
+            if ioc.get("ioc_type") == "cve" and _CVE_RE.match(str(ioc.get("ioc_value", "")))
+        ]
+        
+        for tracked, ioc in enumerate(cve_iocs, 1):
+            metadata = ioc.get("metadata", {})
+            metadata["source"] = ioc.get("source")
+            metadata["first_seen"] = ioc.get("first_seen")
+            metadata["last_seen"] = ioc.get("last_seen")
+            self._track_cve_nosave(str(ioc["ioc_value"]).upper(), metadata)
+            if batch_size and tracked % batch_size == 0:
+                self._save_cves()
+        
+        self._save_cves()
+        logger.info(f"Processed {len(cve_iocs)} CVEs from {len(iocs)} IOCs")
 
@@ -5,12 +5,22 @@ Classifies IOCs and threats by industry sector for
 UAE-specific threat intelligence.
 """
 
-from typing import Any, Dict, List
+from functools import lru_cache
+from typing import Any, Dict, List, Set, Tuple
+
+# Optional: pyahocorasick matches every sector keyword in one pass over the text
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 from backend.core.logger import CTILogger
 
 logger = CTILogger.get_logger(__name__)
 
+# Metadata fields combined with the IOC value for sector matching
+_METADATA_TEXT_FIELDS = ("victim_name", "product", "vendor_project", "description")
+
 
 class SectorClassifier:
     """
@@ -66,8 +76,45 @@ class SectorClassifier:
     
     def __init__(self):
         """Initialize sector classifier."""
+        self._automaton = None
+        # Fallback matcher: keyword tuples per sector, built once
+        self._sector_keywords = tuple(
+            (sector, tuple(patterns)) for sector, patterns in self.SECTOR_PATTERNS.items()
+        )
+        self._build_matcher()
+        # Per-instance memo: feeds repeat the same actors/products/victims a lot
+        self._classify_text = lru_cache(maxsize=65536)(self._classify_text_uncached)
         logger.info("Initialized sector classifier")
     
+    def _build_matcher(self) -> None:
+        """Compile SECTOR_PATTERNS into a single multi-keyword automaton."""
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for sector, patterns in self.SECTOR_PATTERNS.items():
+                for pattern in patterns:
+                    if pattern in automaton:
+                        automaton.get(pattern).add(sector)
+                    else:
+                        automaton.add_word(pattern, {sector})
+            automaton.make_automaton()
+            self._automaton = automaton
+    
+    def _match_sectors(self, text: str) -> Set[str]:
+        """Return every sector with at least one keyword in lowercased text."""
+        found: Set[str] = set()
+        if self._automaton is not None:
+            for _, sectors in self._automaton.iter(text):
+                found |= sectors
+            return found
+        
+        # str.__contains__ is a C-level fast search; stop at the first hit per sector
+        for sector, patterns in self._sector_keywords:
+            for pattern in patterns:
+                if pattern in text:
+                    found.add(sector)
+                    break
+        return found
+    
     def classify(self, ioc: Dict[str, Any]) -> List[str]:
         """
         Classify an IOC by sector.
@@ -78,48 +125,46 @@ class SectorClassifier:
         Returns:
             List of sector classifications
         """
-        sectors = []
+        return list(self._classify_text(self._combined_text(ioc)))
+    
+    def _classify_text_uncached(self, text: str) -> Tuple[str, ...]:
+        """Sectors matched in lowercased text, in SECTOR_PATTERNS order."""
+        # Match against all sector patterns in a single pass
+        found = self._match_sectors(text)
+        return tuple(sector for sector in self.SECTOR_PATTERNS if sector in found)
+    
+    @staticmethod
+    def _combined_text(ioc: Dict[str, Any]) -> str:
+        """Combine all text fields of an IOC (lowercased) for analysis."""
         metadata = ioc.get("metadata", {})
-        
-        # Combine all text fields for analysis
-        text_fields = [
-            str(ioc.get("ioc_value", "")),
-            str(metadata.get("victim_name", "")),
-            str(metadata.get("product", "")),
-            str(metadata.get("vendor_project", "")),
-            str(metadata.get("description", ""))
-        ]
-        
-        combined_text = " ".join(text_fields).lower()
-        
-        # Match against sector patterns
-        for sector, patterns in self.SECTOR_PATTERNS.items():
-            for pattern in patterns:
-                if pattern in combined_text:
-                    if sector not in sectors:
-                        sectors.append(sector)
-                    break
-        
-        return sectors
+        fields = (ioc.get("ioc_value", ""), *(metadata.get(key, "") for key in _METADATA_TEXT_FIELDS))
+        # Empty fields are skipped so sparse IOCs produce a shorter text to scan
+        return " ".join([text for text in map(str, fields) if text]).lower()
     
     def classify_batch(self, iocs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Classify a batch of IOCs by sector.
         
+        Text extraction and keyword matching run as two tight passes over
+        the batch; IOCs sharing the same text (e.g. many IOCs for one
+        victim) are matched once.
+        
         Args:
             iocs: List of IOC dictionaries
             
         Returns:
             List of IOCs with sector classifications added
         """
-        classified = []
-        for ioc in iocs:
-            sectors = self.classify(ioc)
-            ioc["sectors"] = sectors
-            classified.append(ioc)
+        combine = self._combined_text
+        
+        texts = [combine(ioc) for ioc in iocs]
+        sectors_by_text = {text: self._classify_text(text) for text in set(texts)}
+        for ioc, text in zip(iocs, texts):
+            # Fresh list per IOC so downstream mutation can't leak between IOCs
+            ioc["sectors"] = list(sectors_by_text[text])
         
-        logger.info(f"Classified {len(classified)} IOCs by sector")
-        return classified
+        logger.info(f"Classified {len(iocs)} IOCs by sector")
+        return list(iocs)
     
     def get_sector_statistics(self, iocs: List[Dict[str, Any]]) -> Dict[str, int]:
         """
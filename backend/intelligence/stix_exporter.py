@@ -6,15 +6,35 @@ for integration with security tools and platforms.
 """
 
 import json
-from datetime import datetime
-from typing import Any, Dict, List
-from uuid import uuid4
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID, uuid4
 
 from backend.core.logger import CTILogger
 
 logger = CTILogger.get_logger(__name__)
 
 
+def _uuid4_from(buf: bytes, index: int) -> str:
+    """Build a random (version 4) UUID string from the index-th 16-byte slice of buf."""
+    return str(UUID(bytes=buf[index * 16:(index + 1) * 16], version=4))
+
+
+# STIX hash algorithm names by hex digest length
+HASH_ALGO_BY_LEN = {32: "MD5", 40: "SHA-1", 64: "SHA-256"}
+
+# Map IOC types to STIX indicator pattern builders: (ioc_value, ioc) -> pattern
+_PATTERN_BUILDERS = {
+    "ip": lambda value, _: f"[ipv4-addr:value = '{value}']",
+    "domain": lambda value, _: f"[domain-name:value = '{value}']",
+    "url": lambda value, _: f"[url:value = '{value}']",
+    "hash": lambda value, ioc: STIXExporter._hash_to_stix_pattern(value, ioc),
+    "cve": lambda value, _: f"[vulnerability:name = '{value}']",
+    "email": lambda value, _: f"[email-addr:value = '{value}']"
+}
+
+
 class STIXExporter:
     """
     Exports threat intelligence in STIX 2.1 format.
@@ -37,27 +57,38 @@ class STIXExporter:
         Returns:
             STIX bundle dictionary
         """
+        # Shared default timestamp for IOCs missing first_seen/last_seen
+        now_iso = datetime.now(timezone.utc).isoformat()
+        # One urandom read for the bundle ID plus every indicator ID
+        random_ids = os.urandom(16 * (len(iocs) + 1))
         bundle = {
             "type": "bundle",
-            "id": f"bundle--{uuid4()}",
+            "id": f"bundle--{_uuid4_from(random_ids, 0)}",
             "spec_version": "2.1",
             "objects": []
         }
         
-        for ioc in iocs:
-            stix_object = self._ioc_to_stix(ioc)
+        for index, ioc in enumerate(iocs, 1):
+            stix_object = self._ioc_to_stix(ioc, now_iso, indicator_uuid=_uuid4_from(random_ids, index))
             if stix_object:
                 bundle["objects"].append(stix_object)
         
         logger.info(f"Exported {len(bundle['objects'])} IOCs as STIX bundle")
         return bundle
     
-    def _ioc_to_stix(self, ioc: Dict[str, Any]) -> Dict[str, Any]:
+    def _ioc_to_stix(
+        self,
+        ioc: Dict[str, Any],
+        now_iso: Optional[str] = None,
+        indicator_uuid: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Convert IOC to STIX object.
         
         Args:
             ioc: IOC dictionary
+            now_iso: Default timestamp for missing first_seen/last_seen (computed if omitted)
+            indicator_uuid: Pre-generated UUID for the indicator (random if omitted)
             
         Returns:
             STIX object dictionary
@@ -68,34 +99,32 @@ class STIXExporter:
         if not ioc_value:
             return None
         
-        # Map IOC types to STIX indicator patterns
-        pattern_mapping = {
-            "ip": f"[ipv4-addr:value = '{ioc_value}']",
-            "domain": f"[domain-name:value = '{ioc_value}']",
-            "url": f"[url:value = '{ioc_value}']",
-            "hash": self._hash_to_stix_pattern(ioc_value, ioc),
-            "cve": f"[vulnerability:name = '{ioc_value}']",
-            "email": f"[email-addr:value = '{ioc_value}']"
-        }
-        
-        pattern = pattern_mapping.get(ioc_type)
+        # Only the builder for this IOC type runs
+        builder = _PATTERN_BUILDERS.get(ioc_type)
+        pattern = builder(ioc_value, ioc) if builder else None
         if not pattern:
             # Default pattern
             pattern = f"[{ioc_type}:value = '{ioc_value}']"
         
+        if now_iso is None:
+            now_iso = datetime.now(timezone.utc).isoformat()
+        
+        # STIX confidence (0-100): combine risk and relevance scores
+        confidence = int((ioc.get("risk_score", 0) + (ioc.get("relevance_score", 0) * 100)) / 2)
+        
         # Create STIX indicator
         stix_indicator = {
             "type": "indicator",
-            "id": f"indicator--{uuid4()}",
+            "id": f"indicator--{indicator_uuid or uuid4()}",
             "spec_version": "2.1",
-            "created": ioc.get("first_seen", datetime.now().isoformat()),
-            "modified": ioc.get("last_seen", datetime.now().isoformat()),
+            "created": ioc.get("first_seen", now_iso),
+            "modified": ioc.get("last_seen", now_iso),
             "pattern": pattern,
             "pattern_type": "stix",
             "pattern_version": "2.1",
-            "valid_from": ioc.get("first_seen", datetime.now().isoformat()),
+            "valid_from": ioc.get("first_seen", now_iso),
             "labels": ["malicious-activity"],
-            "confidence": self._calculate_confidence(ioc)
+            "confidence": min(max(confidence, 0), 100)
         }
         
         # Add kill chain phases if available
@@ -110,26 +139,11 @@ class STIXExporter:
         
         return stix_indicator
     
-    def _hash_to_stix_pattern(self, hash_value: str, ioc: Dict[str, Any]) -> str:
+    @staticmethod
+    def _hash_to_stix_pattern(hash_value: str, ioc: Dict[str, Any]) -> str:
         """Convert hash to STIX pattern."""
-        hash_length = len(hash_value)
-        if hash_length == 32:
-            return f"[file:hashes.'MD5' = '{hash_value}']"
-        elif hash_length == 40:
-            return f"[file:hashes.'SHA-1' = '{hash_value}']"
-        elif hash_length == 64:
-            return f"[file:hashes.'SHA-256' = '{hash_value}']"
-        else:
-            return f"[file:hashes.'UNKNOWN' = '{hash_value}']"
-    
-    def _calculate_confidence(self, ioc: Dict[str, Any]) -> int:
-        """Calculate STIX confidence score (0-100)."""
-        risk_score = ioc.get("risk_score", 0)
-        relevance_score = ioc.get("relevance_score", 0)
-        
-        # Combine risk and relevance scores
-        confidence = int((risk_score + (relevance_score * 100)) / 2)
-        return min(max(confidence, 0), 100)
+        algo = HASH_ALGO_BY_LEN.get(len(hash_value), "UNKNOWN")
+        return f"[file:hashes.'{algo}' = '{hash_value}']"
     
     def export_to_file(self, iocs: List[Dict[str, Any]], filepath: str) -> None:
         """
@@ -12,9 +12,11 @@ except ImportError:
     import json as json_lib
 
 from backend.core.logger import CTILogger
+from backend.utils.jsonl import dumps_line
 
 logger = CTILogger.get_logger(__name__)
 
+
 class BaseParser(ABC):
     def __init__(
         self,
@@ -63,19 +65,27 @@ class BaseParser(ABC):
         }
 
     def save_processed_data(self, data: List[Dict[str, Any]]) -> Path:
-        """Efficiency Change: Using context managers and fast serialization."""
+        """
+        Efficiency Change: Streams one JSON record per line (JSONL) so only a
+        single serialized item is in memory at a time.
+        Set config 'legacy_json_array' to also write the old indented .json array.
+        """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{self.name}_{timestamp}.json"
-        filepath = self.processed_data_dir / filename
+        filepath = self.processed_data_dir / f"{self.name}_{timestamp}.jsonl"
         
         try:
-            # Using 'wb' for binary if using orjson, 'w' for standard json
-            mode = 'wb' if 'orjson' in str(json_lib) else 'w'
-            with open(filepath, mode, encoding=None if mode == 'wb' else "utf-8") as f:
-                if mode == 'wb':
-                    f.write(json_lib.dumps(data, option=json_lib.OPT_INDENT_2))
-                else:
-                    json_lib.dump(data, f, indent=2, default=str)
+            with open(filepath, "wb") as f:
+                f.writelines(dumps_line(item) for item in data)
+            
+            if self.config.get("legacy_json_array", False):
+                # Using 'wb' for binary if using orjson, 'w' for standard json
+                legacy_path = filepath.with_suffix(".json")
+                mode = 'wb' if 'orjson' in str(json_lib) else 'w'
+                with open(legacy_path, mode, encoding=None if mode == 'wb' else "utf-8") as f:
+                    if mode == 'wb':
+                        f.write(json_lib.dumps(data, option=json_lib.OPT_INDENT_2))
+                    else:
+                        json_lib.dump(data, f, indent=2, default=str)
             
             return filepath
         except Exception as e:
@@ -1,4 +1,5 @@
 import cloudscraper
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, Dict
 from backend.core.logger import CTILogger
@@ -18,8 +19,14 @@ class RansomwareLiveScraper(BaseFeed):
 
     def __init__(self, config: Dict[str, Any] = None):
         super().__init__(name="ransomware_live", config=config or {})
-        # Initialize the stealth scraper
-        self.scraper = cloudscraper.create_scraper(
+        # Initialize the stealth scrapers. Cloudflare challenge handling mutates
+        # session state, so each concurrent request gets its own scraper.
+        self.scraper = self._create_scraper()
+        self.victims_scraper = self._create_scraper()
+
+    @staticmethod
+    def _create_scraper():
+        return cloudscraper.create_scraper(
             browser={
                 'browser': 'chrome',
                 'platform': 'windows',
@@ -27,20 +34,23 @@ class RansomwareLiveScraper(BaseFeed):
             }
         )
 
+    @staticmethod
+    def _get_json(scraper, url: str) -> Any:
+        response = scraper.get(url)
+        response.raise_for_status()
+        return response.json()
+
     def fetch(self) -> Dict[str, Any]:
         """Fetches groups and victims in parallel to feed the parser."""
         try:
             logger.info("Fetching structured data from Ransomware.live...")
             
-            # 1. Fetch Groups
-            groups_resp = self.scraper.get(self.GROUPS_URL)
-            groups_resp.raise_for_status()
-            groups_data = groups_resp.json()
-
-            # 2. Fetch Victims (Latest)
-            victims_resp = self.scraper.get(self.VICTIMS_URL)
-            victims_resp.raise_for_status()
-            victims_data = victims_resp.json()
+            # Groups and latest victims are independent round trips: overlap them
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                groups_future = executor.submit(self._get_json, self.scraper, self.GROUPS_URL)
+                victims_future = executor.submit(self._get_json, self.victims_scraper, self.VICTIMS_URL)
+                groups_data = groups_future.result()
+                victims_data = victims_future.result()
 
             logger.info(f"Retrieved {len(groups_data)} groups and {len(victims_data)} victims.")
 
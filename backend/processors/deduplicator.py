@@ -5,31 +5,143 @@ Removes duplicate IOCs using fingerprinting and caching mechanisms.
 Supports both in-memory and persistent deduplication tracking.
 """
 
-import json
+import hashlib
+import logging
+import math
+import mmap
+import os
 import pickle
+import struct
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, Iterable, List, Optional, Set, Union
 
 from backend.core.logger import CTILogger
 
 logger = CTILogger.get_logger(__name__)
 
+# Fingerprints are stored as raw SHA-256 digests: 32 bytes per entry
+FINGERPRINT_SIZE = 32
+
+
+def _fingerprint_key(fingerprint: Union[str, bytes]) -> bytes:
+    """
+    Convert an IOC fingerprint to its raw 32-byte cache key.
+    
+    Hex SHA-256 fingerprints (the normalizer's format) are decoded; any
+    other value is hashed so every key has the same fixed size.
+    """
+    if isinstance(fingerprint, bytes):
+        if len(fingerprint) == FINGERPRINT_SIZE:
+            return fingerprint
+        return hashlib.sha256(fingerprint).digest()
+    fingerprint = str(fingerprint)
+    if len(fingerprint) == FINGERPRINT_SIZE * 2:
+        try:
+            return bytes.fromhex(fingerprint)
+        except ValueError:
+            pass
+    return hashlib.sha256(fingerprint.encode("utf-8")).digest()
+
+
+class _BloomFilter:
+    """
+    Fixed-size Bloom filter over raw fingerprint digests, kept in an mmap'd
+    bit file so it survives restarts without re-reading the fingerprint log.
+    
+    The k bit positions come from double hashing on the first 16 bytes of
+    the (already uniformly distributed) SHA-256 digest.
+    """
+    
+    _MAGIC = b"CTIBLOOM"
+    _HEADER = struct.Struct("<8sQIQ")  # magic, m (bits), k (hashes), item count
+    _HEADER_SIZE = 32
+    
+    def __init__(self, path: Path, capacity: int, error_rate: float):
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._size = self._HEADER_SIZE + (self.num_bits + 7) // 8
+        
+        # A missing or differently-sized filter is (re)created empty; the caller repopulates it
+        self.is_new = True
+        if path.exists() and path.stat().st_size == self._size:
+            with open(path, "rb") as f:
+                magic, num_bits, num_hashes, _ = self._HEADER.unpack(f.read(self._HEADER.size))
+            self.is_new = (magic, num_bits, num_hashes) != (self._MAGIC, self.num_bits, self.num_hashes)
+        
+        self._fh = open(path, "r+b" if not self.is_new else "w+b")
+        if self.is_new:
+            self._fh.truncate(self._size)
+        self._mm = mmap.mmap(self._fh.fileno(), self._size)
+        if self.is_new:
+            self._mm[:self._HEADER.size] = self._HEADER.pack(self._MAGIC, self.num_bits, self.num_hashes, 0)
+        self._count = self._HEADER.unpack(self._mm[:self._HEADER.size])[3]
+    
+    def _positions(self, key: bytes) -> Iterable[int]:
+        h1 = int.from_bytes(key[:8], "little")
+        h2 = int.from_bytes(key[8:16], "little") | 1
+        m = self.num_bits
+        return ((h1 + i * h2) % m for i in range(self.num_hashes))
+    
+    def __contains__(self, key: bytes) -> bool:
+        mm, offset = self._mm, self._HEADER_SIZE
+        return all(mm[offset + (pos >> 3)] & (1 << (pos & 7)) for pos in self._positions(key))
+    
+    def add(self, key: bytes) -> None:
+        mm, offset = self._mm, self._HEADER_SIZE
+        for pos in self._positions(key):
+            mm[offset + (pos >> 3)] |= 1 << (pos & 7)
+        self._count += 1
+        struct.pack_into("<Q", mm, 20, self._count)
+    
+    def update(self, keys: Iterable[bytes]) -> None:
+        for key in keys:
+            self.add(key)
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def clear(self) -> None:
+        self._mm[self._HEADER_SIZE:] = bytes(self._size - self._HEADER_SIZE)
+        self._count = 0
+        struct.pack_into("<Q", self._mm, 20, 0)
+    
+    def close(self) -> None:
+        self._mm.flush()
+        self._mm.close()
+        self._fh.close()
+
 
 class Deduplicator:
     """
     Deduplicates IOCs using fingerprint-based tracking.
     
     Uses SHA256 fingerprints and Bloom filter-like caching for
-    efficient duplicate detection across feed runs.
+    efficient duplicate detection across feed runs. Seen fingerprints are
+    persisted as an append-only log of raw 32-byte digests, so saving a
+    batch costs O(new fingerprints) instead of rewriting the whole cache.
+    
+    With ``use_bloom`` an mmap'd Bloom filter sits in front of the exact
+    set: a Bloom negative proves the fingerprint is new and skips the set
+    lookup, while a Bloom positive is still verified against the set, so
+    false positives never drop a new IOC. The filter is grown (and a
+    warning logged) once it holds more than ``bloom_capacity`` items.
     """
     
-    def __init__(self, cache_dir: Path = None, use_bloom: bool = False):
+    def __init__(
+        self,
+        cache_dir: Path = None,
+        use_bloom: bool = False,
+        bloom_capacity: int = 1_000_000,
+        bloom_error_rate: float = 1e-7
+    ):
         """
         Initialize deduplicator.
         
         Args:
             cache_dir: Directory for storing deduplication cache
-            use_bloom: Whether to use Bloom filter (future enhancement)
+            use_bloom: Whether to consult a Bloom filter before the exact set
+            bloom_capacity: Expected number of fingerprints (Bloom filter sizing)
+            bloom_error_rate: Target false-positive rate at capacity
         """
         if cache_dir is None:
             if use_bloom:
@@ -44,36 +156,108 @@ class Deduplicator:
             self.cache_dir.unlink()
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.use_bloom = use_bloom
+        self.cache_file = self.cache_dir / "fingerprints.bin"
         
-        self._seen_fingerprints: Set[str] = set()
+        # The exact set is always the authority; the Bloom filter only short-cuts negatives
+        self._seen_fingerprints: Set[bytes] = set()
+        self._bloom: Optional[_BloomFilter] = None
+        self._bloom_capacity = bloom_capacity
+        self._bloom_error_rate = bloom_error_rate
+        if use_bloom:
+            self._bloom = _BloomFilter(self.cache_dir / "bloom.bits", bloom_capacity, bloom_error_rate)
         self._load_cache()
+        self._check_bloom_capacity()
+        # Unbuffered append handle: each batch of new fingerprints is one write
+        self._cache_fh = open(self.cache_file, "ab", buffering=0)
+        # Keys recorded by try_add() but not yet appended to the log
+        self._pending_keys: List[bytes] = []
         
         cache_size = len(self._seen_fingerprints)
         if cache_size > 0:
             logger.info(f"Initialized deduplicator with {cache_size} cached fingerprints from previous runs")
-            logger.debug(f"Cache file: {self.cache_dir / 'fingerprints.pkl'}")
+            logger.debug(f"Cache file: {self.cache_file}")
         else:
             logger.info("Initialized deduplicator with empty cache (fresh start)")
     
     def _load_cache(self) -> None:
-        """Load deduplication cache from disk."""
-        cache_file = self.cache_dir / "fingerprints.pkl"
-        if cache_file.exists():
-            try:
-                with open(cache_file, "rb") as f:
-                    self._seen_fingerprints = pickle.load(f)
-                logger.debug(f"Loaded {len(self._seen_fingerprints)} fingerprints from cache")
-            except Exception as e:
-                logger.warning(f"Failed to load deduplication cache: {e}")
-                self._seen_fingerprints = set()
-    
-    def _save_cache(self) -> None:
-        """Save deduplication cache to disk."""
-        cache_file = self.cache_dir / "fingerprints.pkl"
+        """Load deduplication cache from disk (migrating a legacy pickle cache)."""
+        legacy_file = self.cache_dir / "fingerprints.pkl"
+        bloom = self._bloom
+        if bloom is not None:
+            log_entries = (self.cache_file.stat().st_size if self.cache_file.exists() else 0) // FINGERPRINT_SIZE
+            if not bloom.is_new and len(bloom) == log_entries:
+                # The persisted filter already covers the log; only the set is replayed
+                logger.debug(f"Loaded Bloom filter with {len(bloom)} fingerprints")
+                bloom = None
+            else:
+                bloom.clear()
+        
+        keys: Set[bytes] = set()
         try:
-            with open(cache_file, "wb") as f:
-                pickle.dump(self._seen_fingerprints, f)
-            logger.debug(f"Saved {len(self._seen_fingerprints)} fingerprints to cache")
+            size = self.cache_file.stat().st_size if self.cache_file.exists() else 0
+            if size:
+                usable = size - size % FINGERPRINT_SIZE
+                with open(self.cache_file, "rb") as f:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        keys = {mm[i:i + FINGERPRINT_SIZE] for i in range(0, usable, FINGERPRINT_SIZE)}
+                if usable != size:
+                    # Drop a torn trailing record from an interrupted append
+                    os.truncate(self.cache_file, usable)
+                    logger.warning("Truncated partial record at end of deduplication cache")
+                logger.debug(f"Loaded {len(keys)} fingerprints from cache")
+            elif legacy_file.exists():
+                with open(legacy_file, "rb") as f:
+                    legacy = pickle.load(f)
+                keys = {_fingerprint_key(fp) for fp in legacy}
+                with open(self.cache_file, "wb") as f:
+                    f.write(b"".join(keys))
+                logger.info(f"Migrated {len(keys)} fingerprints from {legacy_file.name}")
+        except Exception as e:
+            logger.warning(f"Failed to load deduplication cache: {e}")
+            keys = set()
+        
+        if bloom is not None:
+            bloom.update(keys)
+        self._seen_fingerprints = keys
+    
+    def _check_bloom_capacity(self) -> None:
+        """Rebuild the Bloom filter at twice its capacity once it is over-full."""
+        bloom = self._bloom
+        if bloom is None or len(bloom) <= self._bloom_capacity:
+            return
+        capacity = self._bloom_capacity * 2
+        while capacity < 2 * len(self._seen_fingerprints):
+            capacity *= 2
+        logger.warning(
+            f"Bloom filter holds {len(bloom)} fingerprints (capacity {self._bloom_capacity}); "
+            f"rebuilding at capacity {capacity}"
+        )
+        bloom.close()
+        self._bloom_capacity = capacity
+        # A differently-sized filter file is recreated empty, then refilled from the set
+        self._bloom = _BloomFilter(
+            self.cache_dir / "bloom.bits", self._bloom_capacity, self._bloom_error_rate
+        )
+        self._bloom.update(self._seen_fingerprints)
+    
+    def _is_seen(self, key: bytes) -> bool:
+        """Exact membership test, short-cut by a Bloom negative when enabled."""
+        bloom = self._bloom
+        if bloom is not None and key not in bloom:
+            return False
+        return key in self._seen_fingerprints
+    
+    def _record(self, key: bytes) -> None:
+        """Mark a key as seen in the set (and Bloom filter)."""
+        self._seen_fingerprints.add(key)
+        if self._bloom is not None:
+            self._bloom.add(key)
+    
+    def _save_cache(self, new_keys: List[bytes]) -> None:
+        """Append newly seen fingerprints to the on-disk log."""
+        try:
+            self._cache_fh.write(b"".join(new_keys))
+            logger.debug(f"Appended {len(new_keys)} fingerprints to cache")
         except Exception as e:
             logger.error(f"Failed to save deduplication cache: {e}")
     
@@ -87,33 +271,43 @@ class Deduplicator:
         Returns:
             List of unique IOCs
         """
+        is_seen = self._is_seen
+        record = self._record
+        # Evaluate the level once instead of formatting a message per duplicate
+        debug = logger.isEnabledFor(logging.DEBUG)
         unique_iocs = []
-        new_fingerprints = set()
-        duplicates = 0
+        new_keys = []
+        missing = 0
         
         for ioc in iocs:
             fingerprint = ioc.get("fingerprint")
             if not fingerprint:
-                logger.warning("IOC missing fingerprint, skipping deduplication")
+                missing += 1
                 unique_iocs.append(ioc)
                 continue
             
-            if fingerprint in self._seen_fingerprints:
-                duplicates += 1
-                logger.debug(f"Duplicate IOC detected: {ioc.get('ioc_type')}:{ioc.get('ioc_value')}")
+            key = _fingerprint_key(fingerprint)
+            if is_seen(key):
+                if debug:
+                    logger.debug("Duplicate IOC detected: %s:%s", ioc.get("ioc_type"), ioc.get("ioc_value"))
                 continue
             
-            # New IOC
+            # New IOC (adding it here also drops repeats within the batch)
+            record(key)
+            new_keys.append(key)
             unique_iocs.append(ioc)
-            new_fingerprints.add(fingerprint)
-            self._seen_fingerprints.add(fingerprint)
         
-        # Save updated cache
-        if new_fingerprints:
-            self._save_cache()
+        if missing:
+            logger.warning(f"{missing} IOCs missing fingerprint, skipped deduplication for them")
+        
+        # Append only the new fingerprints
+        if new_keys:
+            self._save_cache(new_keys)
+            self._check_bloom_capacity()
         
+        duplicates = len(iocs) - len(unique_iocs)
         logger.info(f"Deduplicated {len(iocs)} IOCs: {len(unique_iocs)} unique, {duplicates} duplicates")
-        if duplicates > 0:
+        if duplicates > 0 and debug:
             logger.debug(f"Cache contains {len(self._seen_fingerprints)} total fingerprints")
         return unique_iocs
     
@@ -127,7 +321,7 @@ class Deduplicator:
         Returns:
             True if duplicate
         """
-        return fingerprint in self._seen_fingerprints
+        return self._is_seen(_fingerprint_key(fingerprint))
     
     def add_fingerprint(self, fingerprint: str) -> None:
         """
@@ -136,9 +330,38 @@ class Deduplicator:
         Args:
             fingerprint: IOC fingerprint to add
         """
-        if fingerprint not in self._seen_fingerprints:
-            self._seen_fingerprints.add(fingerprint)
-            self._save_cache()
+        key = _fingerprint_key(fingerprint)
+        if not self._is_seen(key):
+            self._record(key)
+            self._save_cache([key])
+            self._check_bloom_capacity()
+    
+    def try_add(self, fingerprint: str) -> bool:
+        """
+        Record a fingerprint if it has not been seen yet.
+        
+        The key is held back until flush(), so a streaming caller still
+        appends to the on-disk log once per batch.
+        
+        Args:
+            fingerprint: IOC fingerprint
+            
+        Returns:
+            True if the fingerprint is new
+        """
+        key = _fingerprint_key(fingerprint)
+        if self._is_seen(key):
+            return False
+        self._record(key)
+        self._pending_keys.append(key)
+        return True
+    
+    def flush(self) -> None:
+        """Append fingerprints recorded by try_add() to the on-disk log."""
+        if self._pending_keys:
+            self._save_cache(self._pending_keys)
+            self._pending_keys = []
+            self._check_bloom_capacity()
     
     def get_statistics(self) -> Dict[str, int]:
         """
@@ -149,14 +372,26 @@ class Deduplicator:
         """
         return {
             "total_fingerprints": len(self._seen_fingerprints),
-            "cache_file_exists": (self.cache_dir / "fingerprints.pkl").exists()
+            "cache_file_exists": self.cache_file.exists()
         }
     
     def clear_cache(self) -> None:
         """Clear deduplication cache."""
         self._seen_fingerprints.clear()
-        cache_file = self.cache_dir / "fingerprints.pkl"
-        if cache_file.exists():
-            cache_file.unlink()
+        if self._bloom is not None:
+            self._bloom.clear()
+        self._pending_keys = []
+        # Truncate the log in place; the append handle stays valid
+        self._cache_fh.truncate(0)
+        legacy_file = self.cache_dir / "fingerprints.pkl"
+        if legacy_file.exists():
+            legacy_file.unlink()
         logger.info("Cleared deduplication cache")
+    
+    def close(self) -> None:
+        """Close the on-disk fingerprint log (and Bloom filter)."""
+        self.flush()
+        self._cache_fh.close()
+        if self._bloom is not None:
+            self._bloom.close()
 
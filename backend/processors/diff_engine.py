@@ -7,15 +7,27 @@ Compares new feed data with previous versions to identify:
 - Removed IOCs
 """
 
-import json
 from pathlib import Path
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, List
+
+# orjson serializes large diffs several times faster than stdlib json
+try:
+    import orjson as json_lib
+except ImportError:
+    import json as json_lib
 
 from backend.core.logger import CTILogger
 
 logger = CTILogger.get_logger(__name__)
 
 
+def _dumps(obj: Any) -> bytes:
+    """Serialize to compact JSON bytes."""
+    if hasattr(json_lib, "OPT_NON_STR_KEYS"):
+        return json_lib.dumps(obj, default=str, option=json_lib.OPT_NON_STR_KEYS)
+    return json_lib.dumps(obj, default=str, separators=(",", ":")).encode("utf-8")
+
+
 class DiffEngine:
     """
     Detects differences between feed data versions.
@@ -55,34 +67,29 @@ class DiffEngine:
         Returns:
             Dictionary with diff results
         """
-        # Create sets of fingerprints for comparison
-        current_fingerprints = {ioc.get("fingerprint") for ioc in current_iocs if ioc.get("fingerprint")}
-        previous_fingerprints = {ioc.get("fingerprint") for ioc in previous_iocs if ioc.get("fingerprint")}
-        
-        # Find new, removed, and unchanged
-        new_fingerprints = current_fingerprints - previous_fingerprints
-        removed_fingerprints = previous_fingerprints - current_fingerprints
-        unchanged_fingerprints = current_fingerprints & previous_fingerprints
-        
-        # Map fingerprints to IOCs
-        current_map = {ioc.get("fingerprint"): ioc for ioc in current_iocs if ioc.get("fingerprint")}
-        previous_map = {ioc.get("fingerprint"): ioc for ioc in previous_iocs if ioc.get("fingerprint")}
+        # Index each side by fingerprint once; dict key lookups replace the set algebra
+        current_map = self._index_by_fingerprint(current_iocs)
+        previous_map = self._index_by_fingerprint(previous_iocs)
         
-        new_iocs = [current_map[fp] for fp in new_fingerprints if fp in current_map]
-        removed_iocs = [previous_map[fp] for fp in removed_fingerprints if fp in previous_map]
-        
-        # Check for updates (same fingerprint but different metadata)
+        # Single pass over the current side classifies new / updated / unchanged
+        new_iocs = []
         updated_iocs = []
-        for fp in unchanged_fingerprints:
-            if fp in current_map and fp in previous_map:
-                current = current_map[fp]
-                previous = previous_map[fp]
-                if current != previous:
-                    updated_iocs.append({
-                        "fingerprint": fp,
-                        "previous": previous,
-                        "current": current
-                    })
+        unchanged_count = 0
+        for fp, current in current_map.items():
+            previous = previous_map.get(fp)
+            if previous is None:
+                new_iocs.append(current)
+            elif current is not previous and current != previous:
+                # Same fingerprint but different metadata
+                updated_iocs.append({
+                    "fingerprint": fp,
+                    "previous": previous,
+                    "current": current
+                })
+            else:
+                unchanged_count += 1
+        
+        removed_iocs = [ioc for fp, ioc in previous_map.items() if fp not in current_map]
         
         diff_result = {
             "feed_name": feed_name,
@@ -90,7 +97,7 @@ class DiffEngine:
             "new_count": len(new_iocs),
             "removed_count": len(removed_iocs),
             "updated_count": len(updated_iocs),
-            "unchanged_count": len(unchanged_fingerprints) - len(updated_iocs),
+            "unchanged_count": unchanged_count,
             "new_iocs": new_iocs,
             "removed_iocs": removed_iocs,
             "updated_iocs": updated_iocs
@@ -106,6 +113,16 @@ class DiffEngine:
         
         return diff_result
     
+    @staticmethod
+    def _index_by_fingerprint(iocs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Map fingerprint -> IOC (last one wins), skipping IOCs without one."""
+        indexed = {}
+        for ioc in iocs:
+            fingerprint = ioc.get("fingerprint")
+            if fingerprint:
+                indexed[fingerprint] = ioc
+        return indexed
+    
     def _save_diff(self, diff_result: Dict[str, Any], feed_name: str) -> None:
         """Save diff result to disk."""
         timestamp = diff_result["timestamp"].replace(":", "-").replace(" ", "_")
@@ -113,8 +130,10 @@ class DiffEngine:
         filepath = self.diff_dir / filename
         
         try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(diff_result, f, indent=2, default=str)
+            # Compact output, serialized in memory and written with one call
+            buf = _dumps(diff_result)
+            with open(filepath, "wb") as f:
+                f.write(buf)
             logger.debug(f"Saved diff to {filepath}")
         except Exception as e:
             logger.error(f"Failed to save diff: {e}")
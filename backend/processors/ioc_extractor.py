@@ -5,7 +5,8 @@ Extracts IOCs from parsed feed data and organizes them by type
 for further processing and storage.
 """
 
-from typing import Any, Dict, List
+from collections import defaultdict
+from typing import Any, DefaultDict, Dict, List
 
 from backend.core.logger import CTILogger
 
@@ -34,18 +35,15 @@ class IOCExtractor:
         Returns:
             Dictionary mapping IOC types to lists of IOCs
         """
-        iocs_by_type: Dict[str, List[Dict[str, Any]]] = {}
+        # One hash lookup per IOC instead of a membership test plus a lookup
+        iocs_by_type: DefaultDict[str, List[Dict[str, Any]]] = defaultdict(list)
         
         for ioc in parsed_data:
-            ioc_type = ioc.get("ioc_type", "unknown")
-            
-            if ioc_type not in iocs_by_type:
-                iocs_by_type[ioc_type] = []
-            
-            iocs_by_type[ioc_type].append(ioc)
+            iocs_by_type[ioc.get("ioc_type", "unknown")].append(ioc)
         
-        logger.info(f"Extracted IOCs: {sum(len(v) for v in iocs_by_type.values())} total across {len(iocs_by_type)} types")
-        return iocs_by_type
+        logger.info(f"Extracted IOCs: {len(parsed_data)} total across {len(iocs_by_type)} types")
+        # Plain dict so missing types still raise KeyError for callers
+        return dict(iocs_by_type)
     
     def get_statistics(self, iocs_by_type: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
         """
@@ -8,7 +8,10 @@ canonical representation across all sources.
 import hashlib
 import ipaddress
 import re
-from typing import Any, Dict, List, Optional
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
 from backend.core.logger import CTILogger
@@ -36,86 +39,152 @@ class IOCNormalizer:
     EMAIL_PATTERN = re.compile(
         r'^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}$'
     )
-    MD5_PATTERN = re.compile(r'^[a-fA-F0-9]{32}$')
-    SHA1_PATTERN = re.compile(r'^[a-fA-F0-9]{40}$')
-    SHA256_PATTERN = re.compile(r'^[a-fA-F0-9]{64}$')
     CVE_PATTERN = re.compile(r'^CVE-\d{4}-\d{4,}$', re.IGNORECASE)
+    # Hash values are lowercased before validation, so one hex class covers all types
+    HEX_PATTERN = re.compile(r'[0-9a-f]+')
+    HASH_LENGTHS = {"md5": 32, "sha1": 40, "sha256": 64}
+    HASH_TYPE_BY_LENGTH = {length: hash_type for hash_type, length in HASH_LENGTHS.items()}
+    # URLs containing any of these take the full urlparse path
+    # (fragments, params, userinfo, IPv6 literals, whitespace urlparse strips)
+    URL_SLOW_PATH_CHARS = frozenset("#;@[]\t\r\n")
     
-    def __init__(self):
-        """Initialize IOC normalizer."""
+    # Upper bound on memoized (ioc_type, ioc_value) -> fingerprint entries
+    FINGERPRINT_CACHE_SIZE = 200_000
+    # Upper bound on memoized (ioc_type, raw value) -> normalized value entries
+    VALUE_CACHE_SIZE = 131_072
+    
+    # Process-pool tuning: smaller batches are cheaper to normalize in-process
+    PARALLEL_MIN_BATCH = 50_000
+    PARALLEL_CHUNK_SIZE = 10_000
+    
+    def __init__(self, workers: int = 1):
+        """
+        Initialize IOC normalizer.
+        
+        Args:
+            workers: Worker processes for large normalize_batch calls (1 = in-process)
+        """
+        self.workers = max(1, workers)
+        # Feeds re-publish the same IOCs run after run; hash each one once
+        self._fp_cache: Dict[Tuple[str, str], str] = {}
+        # ioc_type -> b"<type>:" fingerprint prefix, encoded once per type
+        self._type_prefix: Dict[str, bytes] = {}
+        # ioc_type -> value normalizer: one dict lookup instead of an if/elif chain
+        self._dispatch: Dict[str, Callable[[str], Optional[str]]] = {
+            "ip": self._normalize_ip,
+            "domain": self._normalize_domain,
+            "url": self._normalize_url,
+            "hash": partial(self._normalize_hash, hash_type="hash"),
+            "md5": partial(self._normalize_hash, hash_type="md5"),
+            "sha1": partial(self._normalize_hash, hash_type="sha1"),
+            "sha256": partial(self._normalize_hash, hash_type="sha256"),
+            "cve": self._normalize_cve,
+            "email": self._normalize_email,
+        }
+        # Per-instance memo: repeated values skip regex/ipaddress/urlparse work
+        self._normalize_value = lru_cache(maxsize=self.VALUE_CACHE_SIZE)(self._normalize_value_uncached)
         logger.info("Initialized IOC normalizer")
     
     def normalize(self, ioc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
-        Normalize a single IOC.
+        Normalize a single IOC in place.
         
         Args:
             ioc: IOC dictionary with ioc_type and ioc_value
             
         Returns:
-            Normalized IOC dictionary or None if invalid
+            The same IOC dictionary, normalized, or None if invalid (left unchanged)
         """
-        ioc_type = ioc.get("ioc_type", "").lower()
+        normalized = self._normalize_fields(ioc)
+        if normalized is not None:
+            # Generate fingerprint for deduplication
+            normalized["fingerprint"] = self._generate_fingerprint(
+                normalized["ioc_type"], normalized["ioc_value"]
+            )
+        return normalized
+    
+    def _normalize_fields(self, ioc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Normalize type/value of a single IOC in place, without fingerprinting."""
+        # Intern the handful of type names so every IOC shares one string object
+        ioc_type = sys.intern(ioc.get("ioc_type", "").lower())
         ioc_value = str(ioc.get("ioc_value", "")).strip()
         
         if not ioc_value:
             return None
         
-        normalized_value = None
-        
-        try:
-            if ioc_type == "ip":
-                normalized_value = self._normalize_ip(ioc_value)
-            elif ioc_type == "domain":
-                normalized_value = self._normalize_domain(ioc_value)
-            elif ioc_type == "url":
-                normalized_value = self._normalize_url(ioc_value)
-            elif ioc_type in ["hash", "md5", "sha1", "sha256"]:
-                normalized_value = self._normalize_hash(ioc_value, ioc_type)
-            elif ioc_type == "cve":
-                normalized_value = self._normalize_cve(ioc_value)
-            elif ioc_type == "email":
-                normalized_value = self._normalize_email(ioc_value)
-            else:
-                logger.warning(f"Unknown IOC type: {ioc_type}")
-                normalized_value = ioc_value.lower()
-        except Exception as e:
-            logger.warning(f"Failed to normalize IOC {ioc_type}:{ioc_value}: {e}")
-            return None
+        if ioc_type not in self._dispatch:
+            logger.warning("Unknown IOC type: %s", ioc_type)
+            normalized_value = ioc_value.lower()
+        else:
+            try:
+                normalized_value = self._normalize_value(ioc_type, ioc_value)
+            except Exception as e:
+                logger.warning("Failed to normalize IOC %s:%s: %s", ioc_type, ioc_value, e)
+                return None
         
         if normalized_value is None:
             return None
         
-        # Create normalized IOC
-        normalized = ioc.copy()
-        normalized["ioc_type"] = ioc_type
-        normalized["ioc_value"] = normalized_value
-        normalized["normalized"] = True
-        
-        # Generate fingerprint for deduplication
-        normalized["fingerprint"] = self._generate_fingerprint(ioc_type, normalized_value)
+        # Update in place: parsed IOCs are not reused, so a per-IOC copy is pure overhead
+        ioc["ioc_type"] = ioc_type
+        ioc["ioc_value"] = normalized_value
+        ioc["normalized"] = True
         
-        return normalized
+        return ioc
     
     def normalize_batch(self, iocs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Normalize a batch of IOCs.
+        Normalize a batch of IOCs in place.
         
         Args:
             iocs: List of IOC dictionaries
             
         Returns:
-            List of normalized IOC dictionaries
+            List of the valid IOC dictionaries, normalized (with or without workers)
         """
-        normalized = []
-        for ioc in iocs:
-            norm_ioc = self.normalize(ioc)
-            if norm_ioc:
-                normalized.append(norm_ioc)
+        if self.workers > 1 and len(iocs) >= self.PARALLEL_MIN_BATCH:
+            normalized = self._normalize_fields_parallel(iocs)
+        else:
+            normalized = _normalize_chunk(iocs, self._normalize_fields)
+        
+        # Fingerprint the whole batch in one tight pass (in this process, so the
+        # fingerprint cache keeps paying off across batches)
+        fingerprint = self._generate_fingerprint
+        for norm_ioc in normalized:
+            norm_ioc["fingerprint"] = fingerprint(norm_ioc["ioc_type"], norm_ioc["ioc_value"])
         
         logger.info(f"Normalized {len(normalized)}/{len(iocs)} IOCs")
         return normalized
     
+    def _normalize_value_uncached(self, ioc_type: str, ioc_value: str) -> Optional[str]:
+        """Normalize a value with the handler registered for its (known) type."""
+        return self._dispatch[ioc_type](ioc_value)
+    
+    def clear_caches(self) -> None:
+        """Drop memoized normalized values and fingerprints."""
+        self._normalize_value.cache_clear()
+        self._fp_cache.clear()
+    
+    def _normalize_fields_parallel(self, iocs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Normalize type/value fields across worker processes, preserving order."""
+        chunk_size = self.PARALLEL_CHUNK_SIZE
+        chunks = [iocs[i:i + chunk_size] for i in range(0, len(iocs), chunk_size)]
+        normalized: List[Dict[str, Any]] = []
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(chunks)), initializer=_init_worker
+        ) as pool:
+            # Workers normalize pickled copies and send back only (type, value);
+            # applying them here updates the caller's dicts in place, as in-process
+            for chunk, results in zip(chunks, pool.map(_normalize_chunk_values, chunks)):
+                for ioc, result in zip(chunk, results):
+                    if result is None:
+                        continue
+                    ioc["ioc_type"] = sys.intern(result[0])
+                    ioc["ioc_value"] = result[1]
+                    ioc["normalized"] = True
+                    normalized.append(ioc)
+        return normalized
+    
     def _normalize_ip(self, ip: str) -> Optional[str]:
         """Normalize IP address."""
         try:
@@ -126,27 +195,31 @@ class IOCNormalizer:
             ip_obj = ipaddress.ip_address(ip)
             return str(ip_obj)
         except ValueError:
-            logger.debug(f"Invalid IP address: {ip}")
+            logger.debug("Invalid IP address: %s", ip)
             return None
     
     def _normalize_domain(self, domain: str) -> Optional[str]:
         """Normalize domain name."""
-        # Remove protocol if present
-        domain = domain.replace("http://", "").replace("https://", "")
-        # Remove path
-        domain = domain.split("/")[0]
-        # Remove port
-        domain = domain.split(":")[0]
-        # Remove trailing dot
-        domain = domain.rstrip(".")
-        # Convert to lowercase
-        domain = domain.lower()
+        # Strip leading scheme(s) only: a "://" later on (e.g. in a redirect
+        # query) belongs to the path, not to the host
+        scheme, sep, rest = domain.partition("://")
+        while sep and scheme.isalpha():
+            domain = rest
+            scheme, sep, rest = domain.partition("://")
+        
+        # Strip path, port and trailing dot, then lowercase
+        domain = (
+            domain.partition("/")[0]
+            .partition(":")[0]
+            .rstrip(".")
+            .lower()
+        )
         
         # Validate
         if self.DOMAIN_PATTERN.match(domain):
             return domain
         
-        logger.debug(f"Invalid domain: {domain}")
+        logger.debug("Invalid domain: %s", domain)
         return None
     
     def _normalize_url(self, url: str) -> Optional[str]:
@@ -156,6 +229,21 @@ class IOCNormalizer:
             if not url.startswith(("http://", "https://")):
                 url = "https://" + url
             
+            if url.isascii() and self.URL_SLOW_PATH_CHARS.isdisjoint(url):
+                # Common case: plain str splitting gives the same parts as urlparse
+                scheme, _, rest = url.partition("://")
+                netloc, slash, tail = rest.partition("/")
+                if "?" in netloc:
+                    netloc, _, query = rest.partition("?")
+                    path = ""
+                else:
+                    path, _, query = tail.partition("?")
+                    path = slash + path
+                if not netloc:
+                    return None
+                normalized = f"{scheme}://{netloc.lower()}{path}"
+                return normalized + "?" + query if query else normalized
+            
             parsed = urlparse(url)
             
             # Validate domain
@@ -171,7 +259,7 @@ class IOCNormalizer:
             
             return normalized
         except Exception as e:
-            logger.debug(f"Invalid URL: {url}: {e}")
+            logger.debug("Invalid URL: %s: %s", url, e)
             return None
     
     def _normalize_hash(self, hash_value: str, hash_type: str) -> Optional[str]:
@@ -179,25 +267,18 @@ class IOCNormalizer:
         hash_value = hash_value.lower().strip()
         
         # Determine hash type if not specified
+        # (length alone tells MD5, SHA1 and SHA256 apart; hex is checked below)
         if hash_type == "hash":
-            if self.MD5_PATTERN.match(hash_value):
-                hash_type = "md5"
-            elif self.SHA1_PATTERN.match(hash_value):
-                hash_type = "sha1"
-            elif self.SHA256_PATTERN.match(hash_value):
-                hash_type = "sha256"
-            else:
+            hash_type = self.HASH_TYPE_BY_LENGTH.get(len(hash_value))
+            if hash_type is None:
                 return None
         
-        # Validate based on type
-        if hash_type == "md5" and self.MD5_PATTERN.match(hash_value):
-            return hash_value
-        elif hash_type == "sha1" and self.SHA1_PATTERN.match(hash_value):
-            return hash_value
-        elif hash_type == "sha256" and self.SHA256_PATTERN.match(hash_value):
+        # Validate based on type: cheap length compare first, then a single hex scan
+        if (len(hash_value) == self.HASH_LENGTHS.get(hash_type)
+                and self.HEX_PATTERN.fullmatch(hash_value)):
             return hash_value
         
-        logger.debug(f"Invalid hash: {hash_value} (type: {hash_type})")
+        logger.debug("Invalid hash: %s (type: %s)", hash_value, hash_type)
         return None
     
     def _normalize_cve(self, cve: str) -> Optional[str]:
@@ -225,6 +306,42 @@ class IOCNormalizer:
         Returns:
             SHA256 fingerprint
         """
-        data = f"{ioc_type}:{ioc_value}".encode("utf-8")
-        return hashlib.sha256(data).hexdigest()
+        key = (ioc_type, ioc_value)
+        fingerprint = self._fp_cache.get(key)
+        if fingerprint is None:
+            if len(self._fp_cache) >= self.FINGERPRINT_CACHE_SIZE:
+                self._fp_cache.clear()
+            prefix = self._type_prefix.get(ioc_type)
+            if prefix is None:
+                prefix = self._type_prefix[ioc_type] = f"{ioc_type}:".encode("utf-8")
+            data = prefix + ioc_value.encode("utf-8")
+            fingerprint = self._fp_cache[key] = hashlib.sha256(data).hexdigest()
+        return fingerprint
+
+
+
+# Per-process normalizer used by normalize_batch's worker pool
+_worker_normalizer: Optional[IOCNormalizer] = None
+
+
+def _init_worker() -> None:
+    """Create the worker process's normalizer once, not per chunk."""
+    global _worker_normalizer
+    _worker_normalizer = IOCNormalizer()
+
+
+def _normalize_chunk(
+    iocs: List[Dict[str, Any]],
+    normalize_fields: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """Normalize type/value fields of a chunk, dropping invalid IOCs."""
+    return [norm_ioc for norm_ioc in map(normalize_fields, iocs) if norm_ioc]
+
 
+def _normalize_chunk_values(iocs: List[Dict[str, Any]]) -> List[Optional[Tuple[str, str]]]:
+    """Normalize a chunk in a worker, returning (ioc_type, ioc_value) or None per IOC."""
+    normalize_fields = _worker_normalizer._normalize_fields
+    return [
+        (norm_ioc["ioc_type"], norm_ioc["ioc_value"]) if norm_ioc else None
+        for norm_ioc in map(normalize_fields, iocs)
+    ]
@@ -7,7 +7,13 @@ sector relevance, and threat actor targeting patterns.
 
 import json
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
+
+# Optional: pyahocorasick matches every relevance keyword in one pass over the text
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 from backend.core.logger import CTILogger
 
@@ -43,6 +49,9 @@ class RelevanceEngine:
         "technology": ["tech", "software", "it", "telecom", "communications"]
     }
     
+    # Sources whose IOCs earn the credibility bonus
+    CREDIBLE_SOURCES = ("cisa_kev", "ransomware_live")
+    
     def __init__(self, cache_dir: Path = None):
         """
         Initialize relevance engine.
@@ -55,8 +64,47 @@ class RelevanceEngine:
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
+        self._automaton = None
+        self._build_matcher()
+        # Feeds use a handful of source names; resolve each one's credibility once
+        self._source_credible: Dict[str, bool] = {}
+        
         logger.info("Initialized relevance engine")
     
+    def _build_matcher(self) -> None:
+        """Compile UAE and sector keywords into per-keyword (uae, sector) hit counts."""
+        weights: Dict[str, List[int]] = {}
+        for keyword in self.UAE_KEYWORDS:
+            weights.setdefault(keyword, [0, 0])[0] += 1
+        for keywords in self.SECTOR_KEYWORDS.values():
+            for keyword in keywords:
+                weights.setdefault(keyword, [0, 0])[1] += 1
+        self._keyword_weights: Dict[str, Tuple[int, int]] = {
+            keyword: tuple(counts) for keyword, counts in weights.items()
+        }
+        
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for keyword in self._keyword_weights:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._automaton = automaton
+    
+    def _keyword_hits(self, text: str) -> Tuple[int, int]:
+        """Count distinct UAE and sector keywords present in lowercased text."""
+        if self._automaton is not None:
+            found = {keyword for _, keyword in self._automaton.iter(text)}
+        else:
+            found = [keyword for keyword in self._keyword_weights if keyword in text]
+        
+        uae_hits = sector_hits = 0
+        weights = self._keyword_weights
+        for keyword in found:
+            uae, sector = weights[keyword]
+            uae_hits += uae
+            sector_hits += sector
+        return uae_hits, sector_hits
+    
     def calculate_relevance(self, ioc: Dict[str, Any]) -> float:
         """
         Calculate relevance score for an IOC (0.0 to 1.0).
@@ -70,32 +118,27 @@ class RelevanceEngine:
         score = 0.0
         metadata = ioc.get("metadata", {})
         
-        # Check for UAE-specific indicators
-        ioc_value = str(ioc.get("ioc_value", "")).lower()
-        metadata_str = json.dumps(metadata).lower()
-        combined_text = f"{ioc_value} {metadata_str}"
+        # Check for UAE-specific indicators (lowercase the combined text once)
+        combined_text = f"{ioc.get('ioc_value', '')} {json.dumps(metadata)}".lower()
+        
+        # One scan finds both UAE and sector keyword hits
+        uae_hits, sector_hits = self._keyword_hits(combined_text)
         
         # UAE relevance (0.4 max)
-        uae_score = 0.0
-        for keyword in self.UAE_KEYWORDS:
-            if keyword in combined_text:
-                uae_score += 0.1
-        uae_score = min(uae_score, 0.4)
-        score += uae_score
+        score += min(uae_hits * 0.1, 0.4)
         
         # Sector relevance (0.3 max)
-        sector_score = 0.0
-        for sector, keywords in self.SECTOR_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword in combined_text:
-                    sector_score += 0.05
-        sector_score = min(sector_score, 0.3)
-        score += sector_score
+        score += min(sector_hits * 0.05, 0.3)
         
         # Source credibility (0.2 max)
-        source = ioc.get("source", "").lower()
-        credible_sources = ["cisa_kev", "ransomware_live"]
-        if any(cs in source for cs in credible_sources):
+        source = ioc.get("source", "")
+        credible = self._source_credible.get(source)
+        if credible is None:
+            source_lower = source.lower()
+            credible = self._source_credible[source] = any(
+                cs in source_lower for cs in self.CREDIBLE_SOURCES
+            )
+        if credible:
             score += 0.2
         
         # Recency (0.1 max)
@@ -119,11 +162,10 @@ class RelevanceEngine:
         Returns:
             List of IOCs with relevance_score field added
         """
-        scored_iocs = []
-        for ioc in iocs:
-            relevance_score = self.calculate_relevance(ioc)
-            ioc["relevance_score"] = relevance_score
-            scored_iocs.append(ioc)
+        calculate = self.calculate_relevance
+        scored_iocs = list(iocs)
+        for ioc in scored_iocs:
+            ioc["relevance_score"] = calculate(ioc)
         
         logger.info(f"Scored {len(scored_iocs)} IOCs for relevance")
         return scored_iocs
@@ -8,7 +8,11 @@ Calculates risk scores combining:
 - Threat actor activity
 """
 
-from typing import Any, Dict, List
+import os
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
 
 from backend.core.logger import CTILogger
 
@@ -45,147 +49,343 @@ class RiskEngine:
         "suspicious": 5
     }
     
+    # Risk levels: a score >= RISK_LEVEL_THRESHOLDS[i] ranks above RISK_LEVEL_LABELS[i]
+    RISK_LEVEL_THRESHOLDS = (30, 50, 70)
+    RISK_LEVEL_LABELS = ("low", "medium", "high", "critical")
+    
+    # Metadata keywords signalling each exploitability factor
+    # ("ransom" also covers "ransomware")
+    EXPLOITABILITY_KEYWORDS = {
+        "active_campaign": ("campaign", "active"),
+        "ransomware": ("ransom",),
+        "botnet": ("botnet",),
+        "malware": ("malware",)
+    }
+    
     # Sector risk weights
     HIGH_RISK_SECTORS = ["government", "finance", "healthcare", "energy"]
     MEDIUM_RISK_SECTORS = ["aviation", "technology", "telecom"]
     
     def __init__(self):
         """Initialize risk engine."""
+        # Keyword tiers ordered by descending score, so the first hit in a tier
+        # list is the final score and the remaining scans are skipped
+        self._exploit_tiers: Tuple[Tuple[int, Tuple[str, ...]], ...] = tuple(sorted(
+            (
+                (self.EXPLOITABILITY_FACTORS[factor], keywords)
+                for factor, keywords in self.EXPLOITABILITY_KEYWORDS.items()
+            ),
+            key=lambda tier: tier[0],
+            reverse=True
+        ))
+        self._sector_tiers: Tuple[Tuple[int, Tuple[str, ...]], ...] = (
+            (20, tuple(self.HIGH_RISK_SECTORS)),
+            (10, tuple(self.MEDIUM_RISK_SECTORS))
+        )
+        # Best score the metadata keyword scans can add: (exploitability, sector)
+        self._keyword_ceilings: Tuple[int, int] = (
+            self._exploit_tiers[0][0], self._sector_tiers[0][0]
+        )
+        # Minimum score per level, for filter_by_risk
+        self._level_min_scores: Dict[str, float] = dict(
+            zip(self.RISK_LEVEL_LABELS, (0,) + self.RISK_LEVEL_THRESHOLDS)
+        )
+        # Exact-key fast path for _source_score, precomputed with the full scan
+        # so a key that happens to contain another key still scores the same
+        self._canonical_source_scores: Dict[str, int] = {
+            source: self._scan_source_score(source) for source in self.SOURCE_CREDIBILITY
+        }
         logger.info("Initialized risk engine")
     
-    def calculate_risk(self, ioc: Dict[str, Any]) -> Dict[str, Any]:
+    @staticmethod
+    def _tier_score(text: str, tiers: Tuple[Tuple[int, Tuple[str, ...]], ...], floor: int = 0) -> int:
+        """Highest tier score above floor with a keyword present in text."""
+        for score, keywords in tiers:
+            if score <= floor:
+                break
+            for keyword in keywords:
+                if keyword in text:
+                    return score
+        return floor
+    
+    def calculate_risk(
+        self,
+        ioc: Dict[str, Any],
+        early_exit_below: Optional[float] = None,
+        include_breakdown: bool = True
+    ) -> Dict[str, Any]:
         """
         Calculate comprehensive risk score for an IOC.
         
         Args:
             ioc: IOC dictionary with metadata
+            early_exit_below: Skip the metadata scans if the IOC cannot reach this score;
+                the result is then a lower bound marked "skipped"
+            include_breakdown: Add the per-factor "breakdown" dict to the result
             
         Returns:
             Dictionary with risk score and breakdown
         """
-        risk_score = 0.0
-        breakdown = {}
-        
-        metadata = ioc.get("metadata", {})
         source = ioc.get("source", "unknown").lower()
         ioc_type = ioc.get("ioc_type", "").lower()
+        return self._assess(
+            ioc, self._source_score(source), self._exploit_floor(ioc_type),
+            early_exit_below, include_breakdown
+        )
+    
+    def calculate_risk_score_only(self, ioc: Dict[str, Any]) -> float:
+        """
+        Calculate an IOC's risk score without building the assessment dicts.
         
-        # Source credibility (0-30)
-        source_score = 0
+        Args:
+            ioc: IOC dictionary with metadata
+            
+        Returns:
+            Risk score (0-100), identical to calculate_risk's risk_score
+        """
+        metadata = ioc.get("metadata", {})
+        exploit_floor = self._exploit_floor(ioc.get("ioc_type", "").lower())
+        exploitability_score, sector_score = self._keyword_scores(metadata, exploit_floor)
+        risk_score = (
+            self._source_score(ioc.get("source", "unknown").lower())
+            + exploitability_score + sector_score + self._actor_score(metadata)
+        )
+        return round(min(float(risk_score), 100.0), 2)
+    
+    def _source_score(self, source: str) -> int:
+        """Credibility score (0-30) for a lowercased source name."""
+        # Feeds usually report a canonical key verbatim: one dict probe, no scan
+        score = self._canonical_source_scores.get(source)
+        if score is not None:
+            return score
+        return self._scan_source_score(source)
+    
+    def _scan_source_score(self, source: str) -> int:
+        """Substring scan of SOURCE_CREDIBILITY in declaration order."""
         for cred_source, score in self.SOURCE_CREDIBILITY.items():
             if cred_source in source:
-                source_score = score
-                break
-        if source_score == 0:
-            source_score = self.SOURCE_CREDIBILITY["unknown"]
-        
-        breakdown["source_credibility"] = source_score
-        risk_score += source_score
-        
-        # Exploitability (0-30)
-        exploitability_score = 0
-        
-        # Check for CVE
-        if ioc_type == "cve":
-            exploitability_score = self.EXPLOITABILITY_FACTORS["cve"]
-        
-        # Check metadata for threat indicators
-        metadata_str = str(metadata).lower()
-        if "ransomware" in metadata_str or "ransom" in metadata_str:
-            exploitability_score = max(exploitability_score, self.EXPLOITABILITY_FACTORS["ransomware"])
-        if "campaign" in metadata_str or "active" in metadata_str:
-            exploitability_score = max(exploitability_score, self.EXPLOITABILITY_FACTORS["active_campaign"])
-        if "botnet" in metadata_str:
-            exploitability_score = max(exploitability_score, self.EXPLOITABILITY_FACTORS["botnet"])
-        if "malware" in metadata_str:
-            exploitability_score = max(exploitability_score, self.EXPLOITABILITY_FACTORS["malware"])
-        
-        breakdown["exploitability"] = exploitability_score
-        risk_score += exploitability_score
-        
-        # Sector relevance (0-20)
-        sector_score = 0
-        metadata_str = str(metadata).lower()
-        for sector in self.HIGH_RISK_SECTORS:
-            if sector in metadata_str:
-                sector_score = 20
-                break
-        if sector_score == 0:
-            for sector in self.MEDIUM_RISK_SECTORS:
-                if sector in metadata_str:
-                    sector_score = 10
-                    break
+                return score
+        return self.SOURCE_CREDIBILITY["unknown"]
+    
+    def _exploit_floor(self, ioc_type: str) -> int:
+        """Exploitability floor (0-30) for a lowercased IOC type."""
+        # A CVE is a known exploited vulnerability by construction
+        return self.EXPLOITABILITY_FACTORS["cve"] if ioc_type == "cve" else 0
+    
+    def _keyword_scores(self, metadata: Dict[str, Any], exploit_floor: int) -> Tuple[int, int]:
+        """Exploitability (0-30) and sector relevance (0-20) from metadata keywords."""
+        # One lowercased metadata string serves both keyword scans; an empty
+        # mapping has no keywords, so skip its repr entirely
+        metadata_str = str(metadata).lower() if metadata else ""
+        return (
+            self._tier_score(metadata_str, self._exploit_tiers, exploit_floor),
+            self._tier_score(metadata_str, self._sector_tiers)
+        )
+    
+    @staticmethod
+    def _actor_score(metadata: Dict[str, Any]) -> int:
+        """Threat actor activity (0-20) from attribution fields."""
+        if metadata.get("known_ransomware_campaign_use"):
+            return 20
+        if metadata.get("group") or metadata.get("threat_actor"):
+            return 15
+        return 0
+    
+    def _assess(
+        self,
+        ioc: Dict[str, Any],
+        source_score: int,
+        exploit_floor: int,
+        early_exit_below: Optional[float] = None,
+        include_breakdown: bool = True
+    ) -> Dict[str, Any]:
+        """Score an IOC whose source credibility and exploitability floor are already resolved."""
+        metadata = ioc.get("metadata", {})
         
-        breakdown["sector_relevance"] = sector_score
-        risk_score += sector_score
+        # Threat actor activity: cheap key lookups, so resolved before the scans
+        actor_score = self._actor_score(metadata)
         
-        # Threat actor activity (0-20)
-        actor_score = 0
-        if metadata.get("group") or metadata.get("threat_actor"):
-            actor_score = 15
-        if metadata.get("known_ransomware_campaign_use"):
-            actor_score = 20
+        # Fast reject: even if the metadata scans hit the top tiers, the IOC
+        # cannot reach early_exit_below, so skip the repr and keyword scans
+        skipped = False
+        if early_exit_below is not None:
+            exploit_ceiling, sector_ceiling = self._keyword_ceilings
+            ceiling = source_score + max(exploit_floor, exploit_ceiling) + sector_ceiling + actor_score
+            skipped = ceiling < early_exit_below
         
-        breakdown["threat_actor_activity"] = actor_score
-        risk_score += actor_score
+        if skipped:
+            # Lower bound: the CVE floor stands in for the unscanned keywords
+            exploitability_score, sector_score = exploit_floor, 0
+        else:
+            # Exploitability (0-30): a CVE sets the floor, metadata keywords can raise it
+            # Sector relevance (0-20)
+            exploitability_score, sector_score = self._keyword_scores(metadata, exploit_floor)
         
         # Normalize to 0-100 scale
-        risk_score = min(risk_score, 100.0)
+        risk_score = min(float(source_score + exploitability_score + sector_score + actor_score), 100.0)
         
         # Determine risk level
-        if risk_score >= 70:
-            risk_level = "critical"
-        elif risk_score >= 50:
-            risk_level = "high"
-        elif risk_score >= 30:
-            risk_level = "medium"
-        else:
-            risk_level = "low"
+        risk_level = self.RISK_LEVEL_LABELS[bisect_right(self.RISK_LEVEL_THRESHOLDS, risk_score)]
         
-        return {
+        assessment: Dict[str, Any] = {
             "risk_score": round(risk_score, 2),
-            "risk_level": risk_level,
-            "breakdown": breakdown
+            "risk_level": risk_level
         }
+        if include_breakdown:
+            # Per-factor diagnostics; large batches that only rank or filter can skip them
+            assessment["breakdown"] = {
+                "source_credibility": source_score,
+                "exploitability": exploitability_score,
+                "sector_relevance": sector_score,
+                "threat_actor_activity": actor_score
+            }
+        if skipped:
+            assessment["skipped"] = True
+        return assessment
     
-    def score_batch(self, iocs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def score_batch(
+        self,
+        iocs: List[Dict[str, Any]],
+        early_exit_below: Optional[float] = None,
+        include_breakdown: bool = True
+    ) -> List[Dict[str, Any]]:
         """
         Calculate risk scores for a batch of IOCs.
         
         Args:
             iocs: List of IOC dictionaries
+            early_exit_below: Passed to calculate_risk; IOCs that cannot reach it skip the
+                metadata scans, are left untouched and are omitted from the result
+            include_breakdown: Set risk_breakdown on each IOC (False saves a dict per IOC)
             
         Returns:
-            List of IOCs with risk assessment added
+            List of IOCs with risk assessment added (in place)
         """
+        # Column-wise pre-pass: sources and types repeat across a batch, so
+        # lowercase and resolve each distinct value once instead of per IOC
+        source_scores: Dict[str, int] = {}
+        for source in {ioc.get("source", "unknown") for ioc in iocs}:
+            source_scores[source] = self._source_score(source.lower())
+        exploit_floors: Dict[str, int] = {}
+        for ioc_type in {ioc.get("ioc_type", "") for ioc in iocs}:
+            exploit_floors[ioc_type] = self._exploit_floor(ioc_type.lower())
+        
+        assess = self._assess
         scored_iocs = []
         for ioc in iocs:
-            risk_assessment = self.calculate_risk(ioc)
+            risk_assessment = assess(
+                ioc,
+                source_scores[ioc.get("source", "unknown")],
+                exploit_floors[ioc.get("ioc_type", "")],
+                early_exit_below,
+                include_breakdown
+            )
+            if "skipped" in risk_assessment:
+                # A lower bound is not a score: never write it onto the caller's
+                # IOC (any earlier full score stays), just leave the IOC out
+                continue
             ioc["risk_score"] = risk_assessment["risk_score"]
             ioc["risk_level"] = risk_assessment["risk_level"]
-            ioc["risk_breakdown"] = risk_assessment["breakdown"]
+            if include_breakdown:
+                ioc["risk_breakdown"] = risk_assessment["breakdown"]
+            else:
+                # A breakdown from an earlier scoring would disagree with the new score
+                ioc.pop("risk_breakdown", None)
             scored_iocs.append(ioc)
         
         logger.info(f"Scored {len(scored_iocs)} IOCs for risk")
         return scored_iocs
     
-    def filter_by_risk(self, iocs: List[Dict[str, Any]], min_level: str = "medium") -> List[Dict[str, Any]]:
+    def score_batch_parallel(
+        self,
+        iocs: List[Dict[str, Any]],
+        min_chunk: int = 1000,
+        include_breakdown: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Calculate risk scores for a large batch across worker processes.
+        
+        Args:
+            iocs: List of IOC dictionaries
+            min_chunk: Minimum IOCs per worker; smaller batches are scored in-process
+            include_breakdown: Set risk_breakdown on each IOC (False saves a dict per IOC)
+            
+        Returns:
+            List of IOCs with risk assessment added (in place, as score_batch)
+        """
+        workers = min(os.cpu_count() or 1, len(iocs) // max(1, min_chunk))
+        if workers <= 1:
+            return self.score_batch(iocs, include_breakdown=include_breakdown)
+        
+        # One contiguous chunk per worker keeps pickling to a single round trip each
+        chunk_size = -(-len(iocs) // workers)
+        chunks = [iocs[i:i + chunk_size] for i in range(0, len(iocs), chunk_size)]
+        
+        # Workers get pickled copies, so they send back only the assessments and
+        # the originals are updated here
+        scored_iocs = []
+        with ProcessPoolExecutor(max_workers=len(chunks), initializer=_init_worker) as pool:
+            score_chunk = partial(_score_chunk, include_breakdown=include_breakdown)
+            for chunk, assessments in zip(chunks, pool.map(score_chunk, chunks)):
+                for ioc, (risk_score, risk_level, breakdown) in zip(chunk, assessments):
+                    ioc["risk_score"] = risk_score
+                    ioc["risk_level"] = risk_level
+                    if include_breakdown:
+                        ioc["risk_breakdown"] = breakdown
+                    else:
+                        ioc.pop("risk_breakdown", None)
+                    scored_iocs.append(ioc)
+        
+        logger.info(f"Scored {len(scored_iocs)} IOCs for risk across {len(chunks)} workers")
+        return scored_iocs
+    
+    def filter_by_risk(
+        self,
+        iocs: List[Dict[str, Any]],
+        min_level: str = "medium",
+        rescore: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
         """
         Filter IOCs by minimum risk level.
         
         Args:
             iocs: List of IOC dictionaries
             min_level: Minimum risk level (low, medium, high, critical)
+            rescore: Score the batch first; None scores only if any IOC lacks a risk_score
+                (early exits never write one, so an existing score is always full)
             
         Returns:
             Filtered list of IOCs above risk threshold
         """
-        risk_levels = {"low": 0, "medium": 30, "high": 50, "critical": 70}
-        min_score = risk_levels.get(min_level.lower(), 0)
+        min_score = self._level_min_scores.get(min_level.lower(), 0)
         
-        scored = self.score_batch(iocs)
+        if rescore is None:
+            # Pipeline output is already scored; don't pay for score_batch twice
+            rescore = not all("risk_score" in ioc for ioc in iocs)
+        # Rejects skip the metadata scans and are left out of score_batch's result
+        scored = self.score_batch(iocs, early_exit_below=min_score) if rescore else iocs
         filtered = [ioc for ioc in scored if ioc.get("risk_score", 0) >= min_score]
         
         logger.info(f"Filtered {len(iocs)} IOCs to {len(filtered)} above risk level {min_level}")
         return filtered
 
+
+# Per-process engine used by score_batch_parallel's worker pool
+_worker_engine: Optional[RiskEngine] = None
+
+
+def _init_worker() -> None:
+    """Create the worker process's engine once, not per chunk."""
+    global _worker_engine
+    _worker_engine = RiskEngine()
+
+
+def _score_chunk(
+    iocs: List[Dict[str, Any]],
+    include_breakdown: bool = True
+) -> List[Tuple[float, str, Optional[Dict[str, int]]]]:
+    """Score a chunk, returning (risk_score, risk_level, breakdown or None) per IOC."""
+    return [
+        (ioc["risk_score"], ioc["risk_level"], ioc.get("risk_breakdown"))
+        for ioc in _worker_engine.score_batch(iocs, include_breakdown=include_breakdown)
+    ]
@@ -1,8 +1,10 @@
 """Scripts for the CTI platform."""
 
 # Explicit exports for easier importing
+from backend.scripts.feed_runner import run_feeds
 from backend.scripts.test_tor import test_connection
 
 __all__ = [
+    "run_feeds",
     "test_connection"
 ]       
\ No newline at end of file
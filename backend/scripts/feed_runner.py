@@ -0,0 +1,38 @@
+"""
+Shared asyncio runner for the feed test scripts.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+
+async def run_feeds(
+    worker: Callable[[tuple, Dict[str, Any]], Dict[str, Any]],
+    selected: Dict[str, tuple],
+    workers: int,
+    base_config: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """
+    Runs worker over all selected feeds on one event loop, at most `workers` at a time.
+
+    Args:
+        worker: Blocking per-feed function taking (feed_key, (feed_class, config)) and base_config
+        selected: Feed key -> (feed_class, config)
+        workers: Maximum feeds in flight
+        base_config: Global settings merged under each feed's config
+
+    Returns:
+        Worker results, in the order of `selected`
+    """
+    # to_thread() uses the loop's default executor; size it to the actual concurrency
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=workers, thread_name_prefix="feed-worker")
+    )
+    semaphore = asyncio.Semaphore(workers)
+
+    async def run_one(item: tuple) -> Dict[str, Any]:
+        async with semaphore:
+            # Feed classes use the blocking HTTP client, so each one runs in a worker thread
+            return await asyncio.to_thread(worker, item, base_config)
+
+    return await asyncio.gather(*(run_one(item) for item in selected.items()))
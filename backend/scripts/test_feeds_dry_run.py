@@ -1,9 +1,9 @@
 import sys
 import argparse
+import asyncio
 import time
 from pathlib import Path
 from typing import List, Dict, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent.parent
@@ -11,6 +11,7 @@ sys.path.insert(0, str(PROJECT_ROOT))
 
 from backend.core.logger import CTILogger
 from backend.core.config import get_settings
+from backend.scripts.feed_runner import run_feeds
 from backend.feeds.clearweb import (
     RansomwareLiveFeed,
     CISAKEVFeed,
@@ -21,7 +22,7 @@ from backend.feeds.clearweb import (
 logger = CTILogger.get_logger(__name__)
 settings = get_settings()
 
-def test_feed_worker(feed_info: tuple) -> Dict[str, Any]:
+def test_feed_worker(feed_info: tuple, base_config: Dict[str, Any]) -> Dict[str, Any]:
     """
     Worker function for parallel execution of feed dry runs.
     """
@@ -30,7 +31,7 @@ def test_feed_worker(feed_info: tuple) -> Dict[str, Any]:
     
     try:
         # Merge global .env settings with specific test overrides
-        instance_config = {**settings.model_dump(), **config}
+        instance_config = {**base_config, **config}
         feed = feed_class(config=instance_config)
         
         # Execute the refined dry_run (No 404s due to capability checking)
@@ -69,7 +70,7 @@ def print_results(results: List[Dict[str, Any]]):
 def main():
     parser = argparse.ArgumentParser(description="Parallel CTI Feed Tester")
     parser.add_argument("--feed", type=str, default="all")
-    parser.add_argument("--workers", type=int, default=4, help="Parallel threads")
+    parser.add_argument("--workers", type=int, default=4, help="Max feeds running concurrently")
     args = parser.parse_args()
 
     # Integrated feed definitions with specific requirements
@@ -82,15 +83,15 @@ def main():
 
     selected = all_feeds if args.feed == "all" else {args.feed: all_feeds[args.feed]}
     
-    print(f"\n🚀 Launching {len(selected)} tests across {args.workers} workers...\n")
+    # No point in more workers than feeds
+    workers = max(1, min(args.workers, len(selected)))
+    print(f"\n🚀 Launching {len(selected)} tests across {workers} workers...\n")
     
-    results = []
-    with ThreadPoolExecutor(max_workers=args.workers) as executor:
-        # Submit all feeds to the thread pool for simultaneous testing
-        future_to_feed = {executor.submit(test_feed_worker, item): item[0] for item in selected.items()}
-        
-        for future in as_completed(future_to_feed):
-            results.append(future.result())
+    # Global .env settings are identical for every feed: dump them once
+    base_config = settings.model_dump()
+    
+    # All feeds run simultaneously, gated by the --workers semaphore
+    results = asyncio.run(run_feeds(test_feed_worker, selected, workers, base_config))
 
     print_results(results)
     
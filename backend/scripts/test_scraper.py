@@ -9,6 +9,7 @@ sys.path.insert(0, str(PROJECT_ROOT))
 
 from backend.feeds.darkweb.monitor import RansomwareMonitorFeed
 from backend.core.logger import CTILogger
+from backend.core.tor_client import TorHTTPClient
 
 logger = CTILogger.get_logger("ScraperTest")
 
@@ -22,13 +23,22 @@ TEST_CONFIG = {
     "timeout": 90,
     "max_retries": 3
 }
+# Crawl every onion source at once: wall time is the slowest circuit, not the sum
+TEST_CONFIG["max_concurrent"] = len(TEST_CONFIG["sources"])
 
 def run_diagnostic():
     logger.info("Starting Dark Web Scraper Diagnostic...")
     
+    # TorHTTPClient applies the per-request timeout, retries and raise_for_status,
+    # so a stuck circuit or an error page fails its source instead of hanging the crawl
+    client = TorHTTPClient(
+        timeout=TEST_CONFIG["timeout"],
+        max_retries=TEST_CONFIG["max_retries"]
+    )
+    
     try:
         # Initialize the monitor
-        monitor = RansomwareMonitorFeed(config=TEST_CONFIG)
+        monitor = RansomwareMonitorFeed(http_client=client, config=TEST_CONFIG)
         
         # Execute the fetch logic
         print("\n📡 Connecting to Tor Network...")
@@ -60,6 +70,8 @@ def run_diagnostic():
         
     except Exception as e:
         logger.error(f"Test Failed: {e}", exc_info=True)
+    finally:
+        client.close()
 
 if __name__ == "__main__":
     run_diagnostic()
\ No newline at end of file
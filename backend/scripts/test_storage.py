@@ -1,18 +1,27 @@
+import os
 import sys
 import argparse
+import asyncio
 import time
-import json
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
+from typing import List, Dict, Any, Iterable
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+# zstd shrinks raw feed dumps several-fold; without it files are stored uncompressed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 from backend.core.logger import CTILogger
 from backend.core.config import get_settings
+from backend.scripts.feed_runner import run_feeds
+from backend.utils.jsonl import dumps_line
 from backend.feeds.clearweb import (
     RansomwareLiveFeed,
     CISAKEVFeed,
@@ -23,6 +32,34 @@ from backend.feeds.clearweb import (
 logger = CTILogger.get_logger(__name__)
 settings = get_settings()
 
+def _write_atomic(file_path: Path, lines: Iterable[bytes]) -> Path:
+    """
+    Write lines to a temp file and rename it over the target.
+    
+    Args:
+        file_path: Final (uncompressed) file path
+        lines: Encoded lines to write
+        
+    Returns:
+        Path actually written (with a .zst suffix when zstandard is installed)
+    """
+    if zstandard is not None:
+        file_path = file_path.with_name(file_path.name + ".zst")
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    
+    with open(tmp_path, "wb") as f:
+        if zstandard is not None:
+            with zstandard.ZstdCompressor(level=3).stream_writer(f, closefd=False) as writer:
+                for line in lines:
+                    writer.write(line)
+        else:
+            for line in lines:
+                f.write(line)
+    
+    # A crash mid-write leaves only the .tmp behind, never a truncated dump
+    os.replace(tmp_path, file_path)
+    return file_path
+
 def store_raw_data(feed_name: str, data: Any) -> str:
     """
     Centralized logic to save raw data to your specific file structure.
@@ -39,22 +76,25 @@ def store_raw_data(feed_name: str, data: Any) -> str:
     target_dir = PROJECT_ROOT / "storage" / "raw" / folder_name
     target_dir.mkdir(parents=True, exist_ok=True)
     
-    # Save with a daily timestamp to prevent overwriting
-    file_name = f"{datetime.now().strftime('%Y-%m-%d')}_raw.json"
-    file_path = target_dir / file_name
+    metadata = {
+        "ingested_at": datetime.now().isoformat(),
+        "source": feed_name
+    }
     
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump({
-            "metadata": {
-                "ingested_at": datetime.now().isoformat(),
-                "source": feed_name
-            },
-            "data": data
-        }, f, indent=4)
+    # Save with a daily timestamp to prevent overwriting. Compact JSON, written as bytes.
+    # List payloads are stored as NDJSON (metadata header line, then one record per
+    # line) so large feeds can be stream-parsed downstream.
+    date_prefix = datetime.now().strftime('%Y-%m-%d')
+    if isinstance(data, list):
+        file_path = target_dir / f"{date_prefix}_raw.jsonl"
+        lines = chain((dumps_line({"metadata": metadata}),), map(dumps_line, data))
+    else:
+        file_path = target_dir / f"{date_prefix}_raw.json"
+        lines = (dumps_line({"metadata": metadata, "data": data}),)
         
-    return str(file_path)
+    return str(_write_atomic(file_path, lines))
 
-def test_feed_worker(feed_info: tuple) -> Dict[str, Any]:
+def test_feed_worker(feed_info: tuple, base_config: Dict[str, Any]) -> Dict[str, Any]:
     """
     Worker function: Now performs actual scraping and data persistence.
     """
@@ -62,7 +102,7 @@ def test_feed_worker(feed_info: tuple) -> Dict[str, Any]:
     start_time = time.time()
     
     try:
-        instance_config = {**settings.model_dump(), **config}
+        instance_config = {**base_config, **config}
         feed = feed_class(config=instance_config)
         
         # 1. SCRAPE: Execute actual data collection
@@ -123,13 +163,15 @@ def main():
     }
 
     selected = all_feeds if args.feed == "all" else {args.feed: all_feeds[args.feed]}
+    # No point in more workers than feeds
+    workers = max(1, min(args.workers, len(selected)))
     print(f"\n🚀 Ingesting {len(selected)} feeds into Raw Storage...\n")
     
-    results = []
-    with ThreadPoolExecutor(max_workers=args.workers) as executor:
-        future_to_feed = {executor.submit(test_feed_worker, item): item[0] for item in selected.items()}
-        for future in as_completed(future_to_feed):
-            results.append(future.result())
+    # Global .env settings are identical for every feed: dump them once
+    base_config = settings.model_dump()
+    
+    # All feeds run simultaneously, gated by the --workers semaphore
+    results = asyncio.run(run_feeds(test_feed_worker, selected, workers, base_config))
 
     print_results(results)
 
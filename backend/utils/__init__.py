@@ -1,8 +1,11 @@
 """Utility modules for the CTI platform."""
 
 # Explicit exports for easier importing
-from backend.utils.tor import tor_session
+from backend.utils.jsonl import dumps_line
+from backend.utils.tor import close_tor_session, tor_session
 
 __all__ = [
+    "close_tor_session",
+    "dumps_line",
     "tor_session"
 ]          
\ No newline at end of file
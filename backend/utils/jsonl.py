@@ -0,0 +1,25 @@
+"""
+JSON Lines encoding shared by the tracker logs, parser output and raw storage.
+"""
+from typing import Any
+
+# orjson serializes several times faster than stdlib json when installed
+try:
+    import orjson as json_lib
+except ImportError:
+    import json as json_lib
+
+
+def dumps_line(item: Any) -> bytes:
+    """
+    Serialize one record as a compact, newline-terminated JSON line.
+
+    Args:
+        item: JSON-serializable record (unknown types are stringified)
+
+    Returns:
+        UTF-8 encoded line, including the trailing newline
+    """
+    if hasattr(json_lib, "OPT_APPEND_NEWLINE"):
+        return json_lib.dumps(item, default=str, option=json_lib.OPT_APPEND_NEWLINE)
+    return (json_lib.dumps(item, default=str, separators=(",", ":")) + "\n").encode("utf-8")
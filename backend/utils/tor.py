@@ -1,11 +1,36 @@
+import threading
+from typing import Optional
+
 import requests
+from requests.adapters import HTTPAdapter
+
+# One process-wide session: every caller shares its keep-alive pool, so a Tor
+# circuit is set up once per host instead of once per session
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
 
 def tor_session():
-    """Returns a requests session configured for the local Tor proxy."""
-    session = requests.Session()
-    # Using socks5h allows DNS resolution to happen over the Tor network (critical for .onion)
-    session.proxies = {
-        'http':  'socks5h://127.0.0.1:9050',
-        'https': 'socks5h://127.0.0.1:9050'
-    }
-    return session
\ No newline at end of file
+    """Returns the shared requests session configured for the local Tor proxy."""
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                session = requests.Session()
+                # Using socks5h allows DNS resolution to happen over the Tor network (critical for .onion)
+                session.proxies = {
+                    'http':  'socks5h://127.0.0.1:9050',
+                    'https': 'socks5h://127.0.0.1:9050'
+                }
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _SESSION = session
+    return _SESSION
+
+def close_tor_session():
+    """Closes the shared Tor session (e.g. on shutdown or test teardown)."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is not None:
+            _SESSION.close()
+            _SESSION = None